@@ -0,0 +1,38 @@
+"""Add trigram and full-text search indexes on games
+
+Revision ID: 3f9a2c7d1b64
+Revises: 86c45221f872
+Create Date: 2026-10-18 10:12:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2c7d1b64'
+down_revision: Union[str, Sequence[str], None] = '86c45221f872'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_games_title_trgm', 'games', ['title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_games_publisher_trgm', 'games', ['publisher'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'publisher': 'gin_trgm_ops'})
+    op.create_index('ix_games_search_tsv', 'games',
+                    [sa.text("to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(publisher, ''))")],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_games_search_tsv', table_name='games')
+    op.drop_index('ix_games_publisher_trgm', table_name='games')
+    op.drop_index('ix_games_title_trgm', table_name='games')
+    # pg_trgm is left installed; other databases on the server may rely on it.
@@ -0,0 +1,44 @@
+"""Add user_stats counters table
+
+Revision ID: 5b0d3e9a6c12
+Revises: c4e82b1f07d3
+Create Date: 2026-10-18 15:22:47.903316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0d3e9a6c12'
+down_revision: Union[str, Sequence[str], None] = 'c4e82b1f07d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('collection_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('wishlist_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('plays_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill the counters for existing users.
+    op.execute("""
+        INSERT INTO user_stats (user_id, collection_count, wishlist_count, plays_count)
+        SELECT u.id, coalesce(c.n, 0), coalesce(w.n, 0), coalesce(p.n, 0)
+        FROM users u
+        LEFT JOIN (SELECT user_id, count(*) AS n FROM user_collections GROUP BY user_id) c ON c.user_id = u.id
+        LEFT JOIN (SELECT user_id, count(*) AS n FROM wishlists GROUP BY user_id) w ON w.user_id = u.id
+        LEFT JOIN (SELECT owner_id, count(*) AS n FROM play_sessions GROUP BY owner_id) p ON p.owner_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
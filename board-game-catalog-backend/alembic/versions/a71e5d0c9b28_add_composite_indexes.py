@@ -0,0 +1,89 @@
+"""Add composite indexes for per-user lookups and stale-game sweeps
+
+Revision ID: a71e5d0c9b28
+Revises: 3f9a2c7d1b64
+Create Date: 2026-10-18 14:03:27.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a71e5d0c9b28'
+down_revision: Union[str, Sequence[str], None] = '3f9a2c7d1b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A game can only be on a user's shelf or wishlist once. Duplicates that
+    # slipped past the endpoint checks are folded into the oldest entry (plays
+    # summed, distinct notes and tags kept) before the extras are dropped and
+    # the index enforces it.
+    op.execute("""
+        UPDATE user_collections AS kept SET
+            times_played = merged.times_played,
+            personal_notes = merged.personal_notes,
+            custom_tags = merged.custom_tags,
+            for_sale_trade = merged.for_sale_trade,
+            sale_trade_notes = merged.sale_trade_notes,
+            owned_date = merged.owned_date
+        FROM (
+            SELECT min(id) AS id,
+                   sum(coalesce(times_played, 0)) AS times_played,
+                   string_agg(DISTINCT nullif(personal_notes, ''), E'\\n\\n') AS personal_notes,
+                   string_agg(DISTINCT nullif(custom_tags, ''), ', ') AS custom_tags,
+                   bool_or(coalesce(for_sale_trade, false)) AS for_sale_trade,
+                   string_agg(DISTINCT nullif(sale_trade_notes, ''), E'\\n\\n') AS sale_trade_notes,
+                   min(owned_date) AS owned_date
+            FROM user_collections
+            GROUP BY user_id, game_id
+            HAVING count(*) > 1
+        ) AS merged
+        WHERE kept.id = merged.id
+    """)
+    op.execute("""
+        UPDATE wishlists AS kept SET
+            priority = coalesce(kept.priority, merged.priority),
+            notes = merged.notes,
+            added_date = merged.added_date
+        FROM (
+            SELECT min(id) AS id,
+                   min(priority) AS priority,
+                   string_agg(DISTINCT nullif(notes, ''), E'\\n\\n') AS notes,
+                   min(added_date) AS added_date
+            FROM wishlists
+            GROUP BY user_id, game_id
+            HAVING count(*) > 1
+        ) AS merged
+        WHERE kept.id = merged.id
+    """)
+    op.execute("""
+        DELETE FROM user_collections a USING user_collections b
+        WHERE a.user_id = b.user_id AND a.game_id = b.game_id AND a.id > b.id
+    """)
+    op.execute("""
+        DELETE FROM wishlists a USING wishlists b
+        WHERE a.user_id = b.user_id AND a.game_id = b.game_id AND a.id > b.id
+    """)
+    op.create_index('ix_user_collections_user_id_game_id', 'user_collections', ['user_id', 'game_id'], unique=True)
+    op.create_index('ix_wishlists_user_id_game_id', 'wishlists', ['user_id', 'game_id'], unique=True)
+    op.create_index('ix_play_sessions_owner_id_game_id_date', 'play_sessions', ['owner_id', 'game_id', 'date'], unique=False)
+    op.create_index('ix_play_sessions_owner_id_date_id', 'play_sessions', ['owner_id', 'date', 'id'], unique=False)
+    op.create_index('ix_games_refreshed_at', 'games', [sa.text('coalesce(updated_at, created_at)')], unique=False)
+    op.create_index('ix_games_never_refreshed_no_image', 'games', ['id'], unique=False,
+                    postgresql_where=sa.text("updated_at IS NULL AND (thumbnail_url IS NULL OR thumbnail_url = '')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_games_never_refreshed_no_image', table_name='games')
+    op.drop_index('ix_games_refreshed_at', table_name='games')
+    op.drop_index('ix_play_sessions_owner_id_date_id', table_name='play_sessions')
+    op.drop_index('ix_play_sessions_owner_id_game_id_date', table_name='play_sessions')
+    op.drop_index('ix_wishlists_user_id_game_id', table_name='wishlists')
+    op.drop_index('ix_user_collections_user_id_game_id', table_name='user_collections')
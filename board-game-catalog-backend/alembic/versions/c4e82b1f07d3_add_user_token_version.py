@@ -0,0 +1,28 @@
+"""Add token_version to users
+
+Revision ID: c4e82b1f07d3
+Revises: a71e5d0c9b28
+Create Date: 2026-10-18 14:41:09.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e82b1f07d3'
+down_revision: Union[str, Sequence[str], None] = 'a71e5d0c9b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
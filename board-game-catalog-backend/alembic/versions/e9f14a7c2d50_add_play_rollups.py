@@ -0,0 +1,90 @@
+"""Add play analytics rollup tables
+
+Revision ID: e9f14a7c2d50
+Revises: 5b0d3e9a6c12
+Create Date: 2026-10-18 16:05:12.674120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9f14a7c2d50'
+down_revision: Union[str, Sequence[str], None] = '5b0d3e9a6c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('play_day_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('play_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'date')
+    )
+    op.create_table('play_month_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('play_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+    op.create_table('play_game_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('play_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_played', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'game_id')
+    )
+    op.create_table('play_coplayer_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('player', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('play_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'player')
+    )
+
+    # Backfill from existing plays; rebuild_play_rollups.py does the same from the app.
+    op.execute("""
+        INSERT INTO play_day_rollups (user_id, date, play_count)
+        SELECT owner_id, date, count(*) FROM play_sessions GROUP BY owner_id, date
+    """)
+    op.execute("""
+        INSERT INTO play_month_rollups (user_id, month, play_count)
+        SELECT owner_id, date_trunc('month', date)::date, count(*) FROM play_sessions
+        GROUP BY owner_id, date_trunc('month', date)::date
+    """)
+    op.execute("""
+        INSERT INTO play_game_rollups (user_id, game_id, play_count, rating_sum, rating_count, last_played)
+        SELECT owner_id, game_id, count(*), coalesce(sum(rating), 0), count(rating), max(date)
+        FROM play_sessions GROUP BY owner_id, game_id
+    """)
+    op.execute(r"""
+        INSERT INTO play_coplayer_rollups (user_id, player, name, play_count)
+        SELECT owner_id, lower(name), min(name), count(DISTINCT id)
+        FROM (
+            SELECT ps.id, ps.owner_id, btrim(regexp_replace(part, '\s+', ' ', 'g')) AS name
+            FROM play_sessions ps, regexp_split_to_table(ps.players, '[,;\n]') AS part
+            WHERE ps.players IS NOT NULL
+        ) parts
+        WHERE name <> ''
+        GROUP BY owner_id, lower(name)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('play_coplayer_rollups')
+    op.drop_table('play_game_rollups')
+    op.drop_table('play_month_rollups')
+    op.drop_table('play_day_rollups')
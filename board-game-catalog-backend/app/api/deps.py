@@ -1,13 +1,17 @@
 # board-game-catalog-backend/app/api/deps.py
-from typing import Generator
+from typing import List
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import get_db
-from app import models, crud, schemas
+from app import crud, schemas
+from app.services import bgg_api
+from app.services.game_resolver import game_resolver, GameNotFoundError
+from app.services.principal_cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token") # FIXED: Added leading slash
 
@@ -16,7 +20,7 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -24,13 +28,40 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     )
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+        token_data = schemas.TokenData(
+            email=payload.get("sub"), user_id=payload.get("uid"), token_version=payload.get("ver")
+        )
+    except (JWTError, ValidationError):
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
+
+    # Tokens issued before user ids and versions were embedded can't be revoked,
+    # so they are no longer accepted; their holders have to log in again.
+    if token_data.user_id is None or token_data.token_version is None:
         raise credentials_exception
+
+    # Most requests are answered from the principal cache without touching the database.
+    user = principal_cache.get(token_data.user_id)
+    if user is None or user.token_version != token_data.token_version:
+        user = await crud.get_user(db, user_id=token_data.user_id)
+        if user is None or user.token_version != token_data.token_version:
+            raise credentials_exception
+        principal_cache.remember(user)
     return user
+
+async def get_or_create_game(db: AsyncSession, bgg_id: int) -> schemas.GameInDB:
+    """
+    Resolves a BGG ID to a local game via the shared GameResolver,
+    fetching it from BGG and storing it locally on a miss.
+    """
+    try:
+        return await game_resolver.resolve(db, bgg_id)
+    except GameNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except bgg_api.BGGAPIError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def get_or_create_games(db: AsyncSession, bgg_ids: List[int]) -> List[schemas.GameInDB]:
+    try:
+        return await game_resolver.resolve_many(db, bgg_ids)
+    except bgg_api.BGGAPIError as e:
+        raise HTTPException(status_code=503, detail=str(e))
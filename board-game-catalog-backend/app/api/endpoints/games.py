@@ -1,98 +1,143 @@
 # app/api/endpoints/games.py
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas, models
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_or_create_game, get_or_create_games
+from app.config import settings
 from app.database import get_db
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
 from app.services import bgg_api
+from app.services.search_cache import search_cache
 
 router = APIRouter()
 
-def get_or_create_game(db: Session, bgg_id: int) -> models.Game:
-    """
-    Checks for a game in the local DB by BGG ID.
-    If found, it checks if the data is stale (missing thumbnail) and updates if necessary.
-    If not found, fetches from BGG, creates it locally, and returns it.
-    """
-    db_game = crud.get_game_by_bgg_id(db, bgg_id=bgg_id)
-    
-    # --- NEW SELF-HEALING CACHE LOGIC ---
-    if db_game and not db_game.thumbnail_url:
-        # Cache hit, but the data is stale (missing image). Re-fetch and update.
-        try:
-            bgg_details = bgg_api.get_bgg_game_details(bgg_id)
-            if bgg_details:
-                game_update_schema = schemas.GameCreate(**bgg_details)
-                db_game = crud.update_game_details(db, db_game=db_game, game_update=game_update_schema)
-        except bgg_api.BGGAPIError as e:
-            # If BGG fails, we can still return the stale data we have.
-            print(f"Could not refresh stale cache for bgg_id {bgg_id}: {e}")
-
-    elif not db_game:
-        # Cache miss, fetch from BGG and create new entry
-        try:
-            bgg_details = bgg_api.get_bgg_game_details(bgg_id)
-            if not bgg_details:
-                raise HTTPException(status_code=404, detail=f"Game with BGG ID {bgg_id} not found.")
-            game_to_create = schemas.GameCreate(**bgg_details)
-            db_game = crud.create_game(db=db, game=game_to_create)
-        except bgg_api.BGGAPIError as e:
-            raise HTTPException(status_code=503, detail=str(e))
-
-    return db_game
-
+MAX_BGG_IDS_PER_REQUEST = 500
 
 @router.get("/search-bgg", response_model=List[schemas.GameSearchResult])
-def search_games_on_bgg(query: str):
+async def search_games_on_bgg(query: str, db: AsyncSession = Depends(get_db)):
     try:
-        return bgg_api.search_bgg_games(query)
+        return await search_cache.search(query)
+    except bgg_api.BGGAPIError:
+        # BGG is unhealthy or saturated: answer from the games we already have instead.
+        return await crud.search_games(db, query=query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/search", response_model=List[schemas.GameSearchResult])
+async def search_games(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ranked search over games we already know locally. BGG is only consulted
+    when the local results are too few.
+    """
+    results = [schemas.GameSearchResult.model_validate(game, from_attributes=True)
+               for game in await crud.search_games(db, query=q, limit=limit)]
+    if len(results) >= min(limit, settings.local_search_min_results):
+        return results
+
+    seen = {result.bgg_id for result in results}
+    try:
+        bgg_results = await search_cache.search(q)
+    except bgg_api.BGGAPIError:
+        return results
+    for result in bgg_results:
+        if len(results) >= limit:
+            break
+        if result["bgg_id"] not in seen:
+            seen.add(result["bgg_id"])
+            results.append(schemas.GameSearchResult(**result))
+    return results
+
+
+@router.get("/autocomplete", response_model=List[schemas.GameSearchResult])
+async def autocomplete_games(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Fast title-prefix suggestions from the local games table only."""
+    return await crud.autocomplete_games(db, prefix=q, limit=limit)
+
+
+@router.get("/", response_model=List[schemas.GameInDB])
+async def get_games_details(
+    bgg_ids: str = Query(..., description="Comma-separated BGG IDs"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Resolves many games in one request. Unknown BGG IDs are left out of the result."""
+    try:
+        ids = [int(part) for part in bgg_ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bgg_ids must be a comma-separated list of integers.")
+    if len(ids) > MAX_BGG_IDS_PER_REQUEST:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BGG_IDS_PER_REQUEST} BGG IDs per request.")
+    return await get_or_create_games(db, bgg_ids=ids)
+
+
 @router.get("/{bgg_id}", response_model=schemas.GameInDB)
-def get_game_details(bgg_id: int, db: Session = Depends(get_db)):
-    return get_or_create_game(db, bgg_id=bgg_id)
+async def get_game_details(bgg_id: int, db: AsyncSession = Depends(get_db)):
+    return await get_or_create_game(db, bgg_id=bgg_id)
 
 
 @router.get("/collection/", response_model=List[schemas.UserCollectionInDB])
-def get_user_collection(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return crud.get_user_collections(db, user_id=current_user.id)
+async def get_user_collection(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """One page of the user's collection, by title. Follow X-Next-Cursor for the next page."""
+    rows = await crud.get_user_collections(
+        db, user_id=current_user.id, limit=limit + 1, after=decode_cursor(cursor, (str, int))
+    )
+    return paginate(rows, limit, lambda entry: (entry.game.title, entry.id), request, response)
 
 
 @router.post("/collection/", response_model=schemas.UserCollectionInDB, status_code=status.HTTP_201_CREATED)
-def add_game_to_user_collection(
+async def add_game_to_user_collection(
     collection_data: schemas.UserCollectionCreate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    game_in_db = get_or_create_game(db, bgg_id=collection_data.game_id)
+    game_in_db = await get_or_create_game(db, bgg_id=collection_data.game_id)
     
-    existing_entry = crud.get_user_collection_entry(db, user_id=current_user.id, game_id=game_in_db.id)
+    existing_entry = await crud.get_user_collection_entry(db, user_id=current_user.id, game_id=game_in_db.id)
     if existing_entry:
         raise HTTPException(status_code=409, detail="Game already in your collection.")
 
-    wishlist_entry = crud.get_wishlist_entry(db, user_id=current_user.id, game_id=game_in_db.id)
+    # Moving a game from the wishlist to the collection is one transaction.
+    wishlist_entry = await crud.get_wishlist_entry(db, user_id=current_user.id, game_id=game_in_db.id)
     if wishlist_entry:
-        crud.delete_wishlist_entry(db, entry_id=wishlist_entry.id)
+        await crud.delete_wishlist_entry(db, entry_id=wishlist_entry.id)
 
-    collection_entry = crud.add_game_to_collection(
+    collection_entry = await crud.add_game_to_collection(
         db=db, user_id=current_user.id, game_id=game_in_db.id,
         personal_notes=collection_data.personal_notes, custom_tags=collection_data.custom_tags
     )
+    await db.commit()
     return collection_entry
 
 
 @router.delete("/collection/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_game_from_user_collection(
+async def delete_game_from_user_collection(
     entry_id: int,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_entry = db.query(models.UserCollection).filter(models.UserCollection.id == entry_id, models.UserCollection.user_id == current_user.id).first()
+    db_entry = await db.scalar(select(models.UserCollection).filter(
+        models.UserCollection.id == entry_id, models.UserCollection.user_id == current_user.id
+    ))
     if not db_entry:
         raise HTTPException(status_code=404, detail="Collection entry not found")
-    crud.delete_user_collection_entry(db, entry_id=entry_id)
+    await crud.delete_user_collection_entry(db, entry_id=entry_id)
+    await db.commit()
     return
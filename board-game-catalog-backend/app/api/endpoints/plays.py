@@ -1,64 +1,102 @@
 # app/api/endpoints/plays.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app import crud, models, schemas
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_or_create_game, get_or_create_games
 from app.database import get_db
-from app.services import bgg_api
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
 
 router = APIRouter()
 
+MAX_PLAYS_PER_BULK = 1000
+
 # THIS IS THE NEW ENDPOINT
 @router.get("/", response_model=List[schemas.PlaySessionWithGame])
-def read_all_user_plays(
-    db: Session = Depends(get_db),
+async def read_all_user_plays(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, deprecated=True)
 ):
     """
-    Retrieve all play sessions for the current user.
+    Retrieve the current user's play sessions, newest first.
+    Follow X-Next-Cursor for the next page. `skip` is still accepted for
+    existing clients, but the next-page cursor already accounts for it.
     """
-    return crud.get_all_user_plays(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    rows = await crud.get_all_user_plays(
+        db=db, user_id=current_user.id, limit=limit + 1, after=decode_cursor(cursor, (date, int)), skip=skip
+    )
+    return paginate(rows, limit, lambda play: (play.date, play.id), request, response)
 
 @router.post("/", response_model=schemas.PlaySession, status_code=status.HTTP_201_CREATED)
-def log_play_session(
+async def log_play_session(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     play_in: schemas.PlaySessionCreate,
     current_user: models.User = Depends(get_current_user)
 ):
-    # This function is unchanged
-    game = crud.get_game_by_bgg_id(db, bgg_id=play_in.bgg_id)
-    if not game:
-        bgg_details = bgg_api.get_bgg_game_details(bgg_id=play_in.bgg_id)
-        if not bgg_details:
-            raise HTTPException(status_code=404, detail=f"Game with BGG ID {play_in.bgg_id} not found.")
-        game_to_create = schemas.GameCreate(**bgg_details)
-        game = crud.create_game(db=db, game=game_to_create)
-
-    collection_entry = db.query(models.UserCollection).filter(
-        models.UserCollection.user_id == current_user.id,
-        models.UserCollection.game_id == game.id
-    ).first()
-
-    if collection_entry:
-        collection_entry.times_played += 1
-        db.add(collection_entry)
-    
-    play_session = crud.create_play_session(
+    game = await get_or_create_game(db, bgg_id=play_in.bgg_id)
+    # Also bumps times_played on the collection entry, atomically and in the same commit.
+    play_session = await crud.create_play_session(
         db=db, user_id=current_user.id, game_id=game.id, play_data=play_in
     )
+    await db.commit()
     return play_session
 
+@router.post("/bulk", response_model=List[schemas.PlaySession], status_code=status.HTTP_201_CREATED)
+async def log_play_sessions(
+    *,
+    db: AsyncSession = Depends(get_db),
+    plays_in: List[schemas.PlaySessionCreate],
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Logs many play sessions (a game night, an imported log) in one transaction.
+    Either every play is stored or none is.
+    """
+    if len(plays_in) > MAX_PLAYS_PER_BULK:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_PLAYS_PER_BULK} plays per request.")
+    games = {game.bgg_id: game for game in await get_or_create_games(db, bgg_ids=[play.bgg_id for play in plays_in])}
+    unknown = sorted({play.bgg_id for play in plays_in if play.bgg_id not in games})
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Games not found for BGG IDs: {', '.join(map(str, unknown))}")
+    play_sessions = await crud.create_play_sessions(
+        db=db, user_id=current_user.id, plays=[(games[play.bgg_id].id, play) for play in plays_in]
+    )
+    await db.commit()
+    return play_sessions
+
+@router.get("/analytics", response_model=schemas.PlayAnalytics)
+async def read_play_analytics(
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    top: int = Query(10, ge=1, le=100)
+):
+    """
+    Plays per month, most-played games, average ratings, streaks, h-index and
+    co-players, all served from precomputed rollups.
+    """
+    return await crud.get_play_analytics(db, user_id=current_user.id, top=top)
+
 @router.get("/{game_id}", response_model=List[schemas.PlaySession])
-def read_play_sessions(
+async def read_play_sessions(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     game_id: int,
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
 ):
-    # This function is unchanged
-    return crud.get_play_sessions_for_game(db=db, user_id=current_user.id, game_id=game_id)
+    rows = await crud.get_play_sessions_for_game(
+        db=db, user_id=current_user.id, game_id=game_id,
+        limit=limit + 1, after=decode_cursor(cursor, (date, int))
+    )
+    return paginate(rows, limit, lambda play: (play.date, play.id), request, response)
@@ -1,48 +1,103 @@
 # app/api/endpoints/users.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app import crud, schemas, models
 from app.api.deps import get_current_user
 from app.database import get_db
-from app.core.config import settings
+from app.config import settings
 from app.core import security # Import the whole security module
 
 router = APIRouter()
 
+def _password_hasher_busy(e: security.PasswordHasherBusyError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
 @router.post("/register", response_model=schemas.UserInDB, status_code=status.HTTP_201_CREATED)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db=db, user=user)
+    try:
+        hashed_password = await security.password_hasher.hash(user.password)
+    except security.PasswordHasherBusyError as e:
+        raise _password_hasher_busy(e)
+    db_user = await crud.create_user(db=db, user=user, hashed_password=hashed_password)
+    await db.commit()
+    return db_user
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    user = crud.get_user_by_email(db, email=form_data.username)
-    # This now calls security.verify_password
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(db: AsyncSession = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await crud.get_user_by_email(db, email=form_data.username)
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await security.password_hasher.verify_and_update(
+                form_data.password, user.hashed_password
+            )
+        except security.PasswordHasherBusyError as e:
+            raise _password_hasher_busy(e)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    if new_hash:
+        # The configured bcrypt cost changed since this hash was made; upgrade it now.
+        await crud.update_user_password_hash(db, db_user=user, hashed_password=new_hash)
+        await db.commit()
+    return _issue_token(user)
+
+def _issue_token(user: models.User) -> dict:
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = security.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all_sessions(
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Invalidates every token issued to the user, including the one used for this request."""
+    await crud.revoke_user_tokens(db, user_id=current_user.id)
+    await db.commit()
+
+@router.post("/password", response_model=schemas.Token)
+async def change_password(
+    password_change: schemas.PasswordChange,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Changes the password and revokes every earlier token; returns a fresh one."""
+    # current_user may be a detached copy from the principal cache.
+    user = await crud.get_user(db, user_id=current_user.id)
+    try:
+        verified, _ = await security.password_hasher.verify_and_update(
+            password_change.current_password, user.hashed_password
+        )
+        if not verified:
+            raise HTTPException(status_code=400, detail="Incorrect password")
+        hashed_password = await security.password_hasher.hash(password_change.new_password)
+    except security.PasswordHasherBusyError as e:
+        raise _password_hasher_busy(e)
+    await crud.update_user_password_hash(db, db_user=user, hashed_password=hashed_password)
+    await crud.revoke_user_tokens(db, user_id=user.id)
+    await db.commit()
+    return _issue_token(user)
+
 @router.get("/me", response_model=schemas.UserInDB)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @router.get("/stats", response_model=schemas.UserStats)
-def get_user_statistics(
-    db: Session = Depends(get_db),
+async def get_user_statistics(
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    stats = crud.get_user_stats(db, user_id=current_user.id)
+    stats = await crud.get_user_stats(db, user_id=current_user.id)
     return stats
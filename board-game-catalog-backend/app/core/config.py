@@ -1,29 +0,0 @@
-# app/core/config.py
-from pydantic_settings import BaseSettings
-from typing import Optional
-
-class Settings(BaseSettings):
-    # --- Project Settings ---
-    PROJECT_NAME: str = "GameShelf Pro API"
-    
-    # --- Security Settings ---
-    SECRET_KEY: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8 # 8 days
-
-    # --- Database Settings ---
-    # These are loaded from your .env file
-    POSTGRES_SERVER: str
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: str
-    POSTGRES_DB: str
-    
-    # This property builds the full database URL
-    @property
-    def SQLALCHEMY_DATABASE_URI(self) -> str:
-        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
-
-    class Config:
-        case_sensitive = True
-        env_file = ".env"
-
-settings = Settings()
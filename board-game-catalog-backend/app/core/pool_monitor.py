@@ -0,0 +1,87 @@
+# app/core/pool_monitor.py
+import threading
+import time
+from typing import Optional, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+
+class PoolMonitor:
+    """
+    Checkout statistics for one engine's connection pool: how long callers
+    waited for a connection, how many waits were slow or timed out, and how
+    close the pool is to running out (saturation = in use / capacity).
+
+        engine = create_db_engine(monitor=monitor)
+        monitor.stats()
+    """
+
+    def __init__(self, capacity: Optional[int] = None, slow_checkout_seconds: float = 0.05):
+        self.capacity = capacity
+        self.slow_checkout_seconds = slow_checkout_seconds
+        # Sync engines check connections out from several threads.
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.in_use = 0
+        self.in_use_peak = 0
+
+    def instrument(self, pool_class: Type[Pool]) -> Type[Pool]:
+        """A subclass of `pool_class` reporting to this monitor; it survives engine.dispose()."""
+        monitor = self
+
+        class MonitoredPool(pool_class):
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    connection = super()._do_get()
+                except exc.TimeoutError:
+                    monitor._record_timeout(time.perf_counter() - started)
+                    raise
+                monitor._record_checkout(time.perf_counter() - started)
+                return connection
+
+            def _do_return_conn(self, record):
+                monitor._record_checkin()
+                super()._do_return_conn(record)
+
+        MonitoredPool.__name__ = f"Monitored{pool_class.__name__}"
+        return MonitoredPool
+
+    def _record_checkout(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if waited >= self.slow_checkout_seconds:
+                self.slow_checkouts += 1
+            self.in_use += 1
+            self.in_use_peak = max(self.in_use_peak, self.in_use)
+
+    def _record_timeout(self, waited: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def _record_checkin(self):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+                "in_use": self.in_use,
+                "in_use_peak": self.in_use_peak,
+                "capacity": self.capacity,
+                "saturation": self.in_use / self.capacity if self.capacity else None,
+            }
@@ -0,0 +1,53 @@
+# app/core/query_counter.py
+from contextlib import contextmanager
+from typing import List, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database import engine as default_engine
+
+
+class QueryCounter:
+    """
+    Records every SQL statement an engine executes while active.
+
+        with QueryCounter() as queries:
+            await crud.get_user_collections(db, user_id=1)
+        assert queries.count == 1
+    """
+
+    def __init__(self, engine: Optional[Union[Engine, AsyncEngine]] = None):
+        engine = engine or default_engine
+        # Cursor events are emitted by the sync engine an AsyncEngine wraps.
+        self.engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        return False
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine: Optional[Union[Engine, AsyncEngine]] = None):
+    """
+    Fails if the block issues more than `limit` SQL statements, so N+1 regressions
+    (one query per row instead of a fixed number) break the build.
+    """
+    with QueryCounter(engine) as queries:
+        yield queries
+    if queries.count > limit:
+        listing = "\n".join(f"  {statement}" for statement in queries.statements)
+        raise AssertionError(f"Expected at most {limit} queries, got {queries.count}:\n{listing}")
@@ -0,0 +1,58 @@
+# app/core/statement_timer.py
+"""
+Times every SQL statement an engine runs with a single pair of cursor
+listeners, and hands each timing to the registered observers (metrics,
+tracing), so they don't each keep a stack of start times per connection.
+
+A statement that fails never reaches after_cursor_execute; the handle_error
+listener drops its start time instead, or the stack would grow with every
+DB error.
+"""
+import time
+import weakref
+from typing import Callable, List
+
+from sqlalchemy import event
+
+# observer(statement, parameters, elapsed_seconds, executemany)
+Observer = Callable[[str, object, float, bool], None]
+
+_STARTED = "statement_timer_started"
+_observers: "weakref.WeakKeyDictionary[object, List[Observer]]" = weakref.WeakKeyDictionary()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+    if context is not None:
+        context.statement_timer_pending = True
+
+
+def _elapsed(conn, context) -> float:
+    if context is not None:
+        context.statement_timer_pending = False
+    return time.perf_counter() - conn.info[_STARTED].pop()
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    if context is not None and getattr(context, "statement_timer_pending", False):
+        context.statement_timer_pending = False
+        exception_context.connection.info[_STARTED].pop()
+
+
+def observe(engine, observer: Observer):
+    """Calls `observer` with the timing of every statement `engine` (sync or async) runs."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    observers = _observers.get(sync_engine)
+    if observers is None:
+        observers = _observers[sync_engine] = []
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = _elapsed(conn, context)
+            for each in observers:
+                each(statement, parameters, elapsed, executemany)
+
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+    observers.append(observer)
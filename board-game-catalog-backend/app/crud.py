@@ -1,151 +1,601 @@
 # app/crud.py
-from sqlalchemy.orm import Session, joinedload
+# Unit of work: crud functions only flush. The caller (normally the endpoint)
+# owns the transaction and commits once, so multi-step operations are atomic.
+import re
+from sqlalchemy import Date, and_, case, cast, delete, func, insert, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 from app import models, schemas
-from app.core.security import get_password_hash # Correctly import from security
-from typing import Optional, List
-from datetime import date, datetime
+from typing import Dict, Iterable, Optional, List, Tuple
+from datetime import date, datetime, timedelta
 
 # --- User CRUD ---
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).filter(models.User.email == email))
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Invalidates every access token issued to the user so far. Returns the new token version."""
+    db_user = await get_user(db, user_id=user_id)
+    if db_user is None:
+        return None
+    # Through the ORM, so the principal cache sees the change and drops the user.
+    db_user.token_version = models.User.token_version + 1
+    await db.flush()
+    await db.refresh(db_user, attribute_names=["token_version"])
+    return db_user.token_version
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    """`hashed_password` comes from security.password_hasher; crud never runs bcrypt itself."""
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
+    db.add(models.UserStats(user_id=db_user.id))
+    await db.flush()
     return db_user
 
+async def update_user_password_hash(db: AsyncSession, db_user: models.User, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    await db.flush()
+    return db_user
+
+# --- User Stats counters ---
+def _dialect_name(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+def _dialect_insert(db: AsyncSession):
+    return postgresql.insert if _dialect_name(db) == "postgresql" else sqlite.insert
+
+async def _increment(db: AsyncSession, model, rows: List[dict], keys: Tuple[str, ...], counters: Tuple[str, ...],
+                     latest: Tuple[str, ...] = ()):
+    """
+    Multi-row upsert that atomically adds each row's `counters` to the stored
+    `model` row with the same `keys`, creating missing rows, in the caller's
+    transaction. Columns in `latest` keep the greater of the stored and the new
+    value; any other columns are only written on insert. Keys must be unique
+    within `rows`.
+    """
+    if not rows:
+        return
+    stmt = _dialect_insert(db)(model).values(rows)
+    set_ = {name: getattr(model, name) + stmt.excluded[name] for name in counters}
+    for name in latest:
+        column = getattr(model, name)
+        set_[name] = case((column >= stmt.excluded[name], column), else_=stmt.excluded[name])
+    await db.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_))
+
+async def _bump_user_stats(db: AsyncSession, user_id: int, **deltas: int):
+    """Adjusts the user's /users/stats counters, e.g. collection_count=1."""
+    await _increment(db, models.UserStats, [{"user_id": user_id, **deltas}], keys=("user_id",), counters=tuple(deltas))
+
+async def reconcile_user_stats(db: AsyncSession) -> int:
+    """
+    Rebuilds every user's counters from the source tables in one set-based
+    statement. Returns the number of users reconciled.
+    """
+    def counts(user_column):
+        return select(user_column.label("user_id"), func.count().label("n")).group_by(user_column).subquery()
+
+    collections = counts(models.UserCollection.user_id)
+    wishlists = counts(models.Wishlist.user_id)
+    plays = counts(models.PlaySession.owner_id)
+    rows = select(
+        models.User.id,
+        func.coalesce(collections.c.n, 0),
+        func.coalesce(wishlists.c.n, 0),
+        func.coalesce(plays.c.n, 0),
+    ).outerjoin(collections, collections.c.user_id == models.User.id) \
+     .outerjoin(wishlists, wishlists.c.user_id == models.User.id) \
+     .outerjoin(plays, plays.c.user_id == models.User.id)
+
+    columns = ["user_id", "collection_count", "wishlist_count", "plays_count"]
+    stmt = _dialect_insert(db)(models.UserStats).from_select(columns, rows)
+    result = await db.execute(stmt.on_conflict_do_update(
+        index_elements=[models.UserStats.user_id],
+        set_={name: stmt.excluded[name] for name in columns[1:]},
+    ))
+    return result.rowcount
+
 # --- Game CRUD ---
-def get_game_by_bgg_id(db: Session, bgg_id: int):
-    return db.query(models.Game).filter(models.Game.bgg_id == bgg_id).first()
-
-def create_game(db: Session, game: schemas.GameCreate):
-    db_game = models.Game(**game.model_dump())
-    db.add(db_game)
-    db.commit()
-    db.refresh(db_game)
+async def get_game_by_bgg_id(db: AsyncSession, bgg_id: int):
+    return await db.scalar(select(models.Game).filter(models.Game.bgg_id == bgg_id))
+
+async def get_games_by_bgg_ids(db: AsyncSession, bgg_ids: List[int]):
+    return (await db.scalars(select(models.Game).filter(models.Game.bgg_id.in_(bgg_ids)))).all()
+
+def _upsert_games_stmt(db: AsyncSession, rows: List[dict]):
+    """
+    INSERT ... ON CONFLICT (bgg_id) DO UPDATE ... RETURNING for the games table,
+    so concurrent workers resolving the same new game never trip ix_games_bgg_id.
+    """
+    stmt = _dialect_insert(db)(models.Game).values(rows)
+    update_columns = {key: stmt.excluded[key] for key in rows[0] if key != "bgg_id"}
+    update_columns["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(
+        index_elements=[models.Game.bgg_id], set_=update_columns
+    ).returning(models.Game)
+
+async def create_game(db: AsyncSession, game: schemas.GameCreate):
+    db_game = (await db.scalars(
+        _upsert_games_stmt(db, [game.model_dump()]),
+        execution_options={"populate_existing": True},
+    )).one()
     return db_game
 
-# Add this function in app/crud.py, after create_game
+async def create_games(db: AsyncSession, games: List[schemas.GameCreate]) -> List[models.Game]:
+    """Upserts many games with a single multi-row INSERT ... ON CONFLICT ... RETURNING."""
+    if not games:
+        return []
+    # A bgg_id may only appear once per statement, or Postgres rejects the upsert.
+    rows = list({game.bgg_id: game.model_dump() for game in games}.values())
+    db_games = (await db.scalars(
+        _upsert_games_stmt(db, rows),
+        execution_options={"populate_existing": True},
+    )).all()
+    return db_games
 
-def update_game_details(db: Session, db_game: models.Game, game_update: schemas.GameCreate) -> models.Game:
+async def update_game_details(db: AsyncSession, db_game: models.Game, game_update: schemas.GameCreate) -> models.Game:
     """Updates an existing game record with fresh data from BGG."""
     update_data = game_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_game, key, value)
-    db.add(db_game)
-    db.commit()
-    db.refresh(db_game)
+    update_data["bgg_id"] = db_game.bgg_id
+    db_game = (await db.scalars(
+        _upsert_games_stmt(db, [update_data]),
+        execution_options={"populate_existing": True},
+    )).one()
     return db_game
 
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Must match the expression indexed by ix_games_search_tsv.
+_GAME_SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(games.title, '') || ' ' || coalesce(games.publisher, ''))"
+
+async def search_games(db: AsyncSession, query: str, limit: int = 20) -> List[models.Game]:
+    """
+    Ranked search over game titles and publishers.
+    On Postgres this uses the pg_trgm and tsvector indexes; elsewhere it falls
+    back to a plain substring match.
+    """
+    pattern = f"%{_escape_like(query)}%"
+    if _dialect_name(db) != "postgresql":
+        return (await db.scalars(select(models.Game).filter(or_(
+            models.Game.title.ilike(pattern, escape="\\"),
+            models.Game.publisher.ilike(pattern, escape="\\"),
+        )).order_by(models.Game.title).limit(limit))).all()
+
+    document = literal_column(_GAME_SEARCH_DOCUMENT)
+    ts_query = func.plainto_tsquery("simple", query)
+    rank = func.greatest(
+        func.similarity(models.Game.title, query),
+        func.similarity(func.coalesce(models.Game.publisher, ""), query) * 0.5,
+    ) + func.ts_rank(document, ts_query)
+    return (await db.scalars(select(models.Game).filter(or_(
+        models.Game.title.op("%")(query),
+        models.Game.title.ilike(pattern, escape="\\"),
+        models.Game.publisher.op("%")(query),
+        document.op("@@")(ts_query),
+    )).order_by(rank.desc(), models.Game.title).limit(limit))).all()
+
+async def autocomplete_games(db: AsyncSession, prefix: str, limit: int = 10) -> List[models.Game]:
+    """Games whose title starts with `prefix`, most-rated first."""
+    return (await db.scalars(select(models.Game).filter(
+        models.Game.title.ilike(f"{_escape_like(prefix)}%", escape="\\")
+    ).order_by(
+        models.Game.bgg_num_voters.desc().nulls_last(), models.Game.title
+    ).limit(limit))).all()
+
+_GAME_REFRESHED_AT = func.coalesce(models.Game.updated_at, models.Game.created_at)
+
+def _is_stale_game(cutoff: datetime):
+    missing_image = or_(models.Game.thumbnail_url.is_(None), models.Game.thumbnail_url == "")
+    return or_(
+        and_(models.Game.updated_at.is_(None), missing_image),
+        _GAME_REFRESHED_AT < cutoff,
+    )
+
+async def get_stale_games(db: AsyncSession, cutoff: datetime, limit: int = 20) -> List[models.Game]:
+    """Games not refreshed since `cutoff`, or never refreshed and missing an image; oldest first."""
+    return (await db.scalars(
+        select(models.Game).filter(_is_stale_game(cutoff)).order_by(_GAME_REFRESHED_AT).limit(limit)
+    )).all()
+
+async def claim_stale_games(db: AsyncSession, cutoff: datetime, lease: timedelta, limit: int = 20,
+                            bgg_ids: Iterable[int] = ()) -> List[int]:
+    """
+    Picks up to `limit` stale games for one refresh pass and leases them: their
+    updated_at is moved so they count as fresh for `lease`, and stale again if
+    the pass never finishes. Those of `bgg_ids` still stale are claimed first.
+    On Postgres, rows another worker is claiming are skipped (FOR UPDATE SKIP
+    LOCKED), so concurrent refreshers never pick the same game. The caller
+    should commit right away. Returns the claimed BGG IDs.
+    """
+    def claimable(query):
+        query = query.filter(_is_stale_game(cutoff))
+        return query.with_for_update(skip_locked=True) if _dialect_name(db) == "postgresql" else query
+
+    bgg_ids = list(bgg_ids)
+    rows = []
+    if bgg_ids:
+        rows += (await db.execute(claimable(
+            select(models.Game.id, models.Game.bgg_id).filter(models.Game.bgg_id.in_(bgg_ids))
+        ).limit(limit))).all()
+    if len(rows) < limit:
+        rows += (await db.execute(claimable(
+            select(models.Game.id, models.Game.bgg_id).filter(models.Game.id.not_in([row.id for row in rows]))
+        ).order_by(_GAME_REFRESHED_AT).limit(limit - len(rows)))).all()
+    if rows:
+        await db.execute(
+            update(models.Game).filter(models.Game.id.in_([row.id for row in rows])).values(updated_at=cutoff + lease),
+            execution_options={"synchronize_session": False},
+        )
+    return [row.bgg_id for row in rows]
+
+async def touch_games(db: AsyncSession, bgg_ids: List[int]):
+    await db.execute(
+        update(models.Game).filter(models.Game.bgg_id.in_(bgg_ids)).values(updated_at=func.now()),
+        execution_options={"synchronize_session": False},
+    )
+
 # --- User Collection CRUD (Restoring missing function) ---
-def get_user_collection_entry(db: Session, user_id: int, game_id: int):
-    return db.query(models.UserCollection).filter(
+async def get_user_collection_entry(db: AsyncSession, user_id: int, game_id: int):
+    return await db.scalar(select(models.UserCollection).filter(
         models.UserCollection.user_id == user_id,
         models.UserCollection.game_id == game_id
-    ).first()
+    ))
 
-def get_user_collections(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.UserCollection).join(models.Game).filter(
+async def get_user_collections(db: AsyncSession, user_id: int, limit: int = 100, after: Optional[Tuple[str, int]] = None):
+    """Keyset-paginated on (game title, entry id); `after` is the last key of the previous page."""
+    # The join used for sorting also populates .game, so serializing costs no extra queries.
+    query = select(models.UserCollection).join(models.Game).options(
+        contains_eager(models.UserCollection.game)
+    ).filter(
         models.UserCollection.user_id == user_id
-    ).order_by(models.Game.title).offset(skip).limit(limit).all()
+    )
+    if after is not None:
+        query = query.filter(tuple_(models.Game.title, models.UserCollection.id) > tuple_(*after))
+    return (await db.scalars(query.order_by(models.Game.title, models.UserCollection.id).limit(limit))).all()
 
-def add_game_to_collection(db: Session, user_id: int, game_id: int, personal_notes: Optional[str] = None, custom_tags: Optional[str] = None):
+async def add_game_to_collection(db: AsyncSession, user_id: int, game_id: int, personal_notes: Optional[str] = None, custom_tags: Optional[str] = None):
+    # Responses embed the game, and an async session can't lazy-load it while
+    # serializing; attach it up front (usually an identity-map hit).
     db_collection_entry = models.UserCollection(
-        user_id=user_id, game_id=game_id, personal_notes=personal_notes, custom_tags=custom_tags
+        user_id=user_id, game=await db.get(models.Game, game_id), personal_notes=personal_notes, custom_tags=custom_tags
     )
     db.add(db_collection_entry)
-    db.commit()
-    db.refresh(db_collection_entry)
+    await _bump_user_stats(db, user_id, collection_count=1)
+    await db.flush()
     return db_collection_entry
 
-def update_user_collection_entry(db: Session, collection_entry_id: int, collection_update: schemas.UserCollectionUpdate):
-    db_entry = db.query(models.UserCollection).filter(models.UserCollection.id == collection_entry_id).first()
+async def update_user_collection_entry(db: AsyncSession, collection_entry_id: int, collection_update: schemas.UserCollectionUpdate):
+    db_entry = await db.get(models.UserCollection, collection_entry_id)
     if not db_entry:
         return None
     update_data = collection_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_entry, key, value)
     db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
+    await db.flush()
     return db_entry
 
-def delete_user_collection_entry(db: Session, entry_id: int):
-    db_entry = db.query(models.UserCollection).filter(models.UserCollection.id == entry_id).first()
+async def delete_user_collection_entry(db: AsyncSession, entry_id: int):
+    db_entry = await db.get(models.UserCollection, entry_id)
     if db_entry:
-        db.delete(db_entry)
-        db.commit()
+        await db.delete(db_entry)
+        await _bump_user_stats(db, db_entry.user_id, collection_count=-1)
+        await db.flush()
     return db_entry
 
 # --- Wishlist CRUD (Restoring missing function) ---
-def get_wishlist_entry(db: Session, user_id: int, game_id: int):
-    return db.query(models.Wishlist).filter(
+async def get_wishlist_entry(db: AsyncSession, user_id: int, game_id: int):
+    return await db.scalar(select(models.Wishlist).filter(
         models.Wishlist.user_id == user_id,
         models.Wishlist.game_id == game_id
-    ).first()
+    ))
 
-def get_user_wishlist(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Wishlist).join(models.Game).filter(
+async def get_user_wishlist(db: AsyncSession, user_id: int, limit: int = 100, after: Optional[Tuple[str, int]] = None):
+    """Keyset-paginated on (game title, entry id); `after` is the last key of the previous page."""
+    query = select(models.Wishlist).join(models.Game).options(
+        contains_eager(models.Wishlist.game)
+    ).filter(
         models.Wishlist.user_id == user_id
-    ).order_by(models.Game.title).offset(skip).limit(limit).all()
+    )
+    if after is not None:
+        query = query.filter(tuple_(models.Game.title, models.Wishlist.id) > tuple_(*after))
+    return (await db.scalars(query.order_by(models.Game.title, models.Wishlist.id).limit(limit))).all()
 
-def add_game_to_wishlist(db: Session, user_id: int, game_id: int, priority: Optional[int] = 1, notes: Optional[str] = None):
-    db_wishlist_entry = models.Wishlist(user_id=user_id, game_id=game_id, priority=priority, notes=notes)
+async def add_game_to_wishlist(db: AsyncSession, user_id: int, game_id: int, priority: Optional[int] = 1, notes: Optional[str] = None):
+    db_wishlist_entry = models.Wishlist(user_id=user_id, game=await db.get(models.Game, game_id), priority=priority, notes=notes)
     db.add(db_wishlist_entry)
-    db.commit()
-    db.refresh(db_wishlist_entry)
+    await _bump_user_stats(db, user_id, wishlist_count=1)
+    await db.flush()
     return db_wishlist_entry
 
-def delete_wishlist_entry(db: Session, entry_id: int):
-    db_entry = db.query(models.Wishlist).filter(models.Wishlist.id == entry_id).first()
+async def delete_wishlist_entry(db: AsyncSession, entry_id: int):
+    db_entry = await db.get(models.Wishlist, entry_id)
     if db_entry:
-        db.delete(db_entry)
-        db.commit()
+        await db.delete(db_entry)
+        await _bump_user_stats(db, db_entry.user_id, wishlist_count=-1)
+        await db.flush()
     return db_entry
 
-def update_wishlist_entry(db: Session, wishlist_entry_id: int, wishlist_update: schemas.WishlistUpdate):
-    db_entry = db.query(models.Wishlist).filter(models.Wishlist.id == wishlist_entry_id).first()
+async def update_wishlist_entry(db: AsyncSession, wishlist_entry_id: int, wishlist_update: schemas.WishlistUpdate):
+    db_entry = await db.get(models.Wishlist, wishlist_entry_id)
     if db_entry:
         update_data = wishlist_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_entry, field, value)
-        db.commit()
-        db.refresh(db_entry)
+        await db.flush()
     return db_entry
 
 # --- PlaySession CRUD ---
-def create_play_session(db: Session, user_id: int, game_id: int, play_data: schemas.PlaySessionCreate):
-    final_date = date.today()
-    if play_data.date:
+def _parse_play_date(value: Optional[str]) -> date:
+    """Play dates are YYYY-MM-DD; anything missing or unparseable means today."""
+    if value:
         try:
-            final_date = datetime.strptime(play_data.date, "%Y-%m-%d").date()
+            return datetime.strptime(value, "%Y-%m-%d").date()
         except (ValueError, TypeError):
             pass
-    db_play_session = models.PlaySession(
-        owner_id=user_id, game_id=game_id, date=final_date,
-        notes=play_data.notes, rating=play_data.rating,
-        game_state_notes=play_data.game_state_notes, players=play_data.players
+    return date.today()
+
+def _new_play_session(user_id: int, game_id: int, play_data: schemas.PlaySessionCreate) -> dict:
+    return {
+        "owner_id": user_id, "game_id": game_id, "date": _parse_play_date(play_data.date),
+        "notes": play_data.notes, "rating": play_data.rating,
+        "game_state_notes": play_data.game_state_notes, "players": play_data.players,
+    }
+
+async def _record_new_plays(db: AsyncSession, user_id: int, plays: List[dict]):
+    """
+    Updates everything derived from play_sessions for newly inserted plays, in
+    the caller's transaction: collection times_played, /users/stats and the
+    analytics rollups. Each is one set-based statement, however many plays.
+    """
+    per_game: Dict[int, int] = {}
+    for play in plays:
+        per_game[play["game_id"]] = per_game.get(play["game_id"], 0) + 1
+    # Incremented in SQL, so concurrent play logging never loses a count.
+    await db.execute(
+        update(models.UserCollection).filter(
+            models.UserCollection.user_id == user_id,
+            models.UserCollection.game_id.in_(per_game),
+        ).values(
+            times_played=func.coalesce(models.UserCollection.times_played, 0)
+                + case(per_game, value=models.UserCollection.game_id, else_=0)
+        ),
+        execution_options={"synchronize_session": False},
     )
+    await _bump_user_stats(db, user_id, plays_count=len(plays))
+    await _record_play_rollups(db, user_id, plays)
+
+async def create_play_session(db: AsyncSession, user_id: int, game_id: int, play_data: schemas.PlaySessionCreate):
+    play = _new_play_session(user_id, game_id, play_data)
+    db_play_session = models.PlaySession(**play)
     db.add(db_play_session)
-    db.commit()
-    db.refresh(db_play_session)
+    await _record_new_plays(db, user_id, [play])
+    await db.flush()
     return db_play_session
 
-def get_play_sessions_for_game(db: Session, user_id: int, game_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.PlaySession).filter(
+async def create_play_sessions(db: AsyncSession, user_id: int,
+                               plays: List[Tuple[int, schemas.PlaySessionCreate]]) -> List[models.PlaySession]:
+    """
+    Logs many plays, given as (game id, play data) pairs, in one transaction:
+    a single multi-row INSERT ... RETURNING plus one batched update per
+    derived counter table.
+    """
+    if not plays:
+        return []
+    rows = [_new_play_session(user_id, game_id, play_data) for game_id, play_data in plays]
+    db_play_sessions = (await db.scalars(
+        insert(models.PlaySession).returning(models.PlaySession), rows
+    )).all()
+    await _record_new_plays(db, user_id, rows)
+    return db_play_sessions
+
+async def get_play_sessions_for_game(db: AsyncSession, user_id: int, game_id: int, limit: int = 100, after: Optional[Tuple[date, int]] = None):
+    """Newest first, keyset-paginated on (date, id)."""
+    query = select(models.PlaySession).filter(
         models.PlaySession.owner_id == user_id,
         models.PlaySession.game_id == game_id
-    ).order_by(models.PlaySession.date.desc()).offset(skip).limit(limit).all()
+    )
+    if after is not None:
+        query = query.filter(tuple_(models.PlaySession.date, models.PlaySession.id) < tuple_(*after))
+    return (await db.scalars(query.order_by(models.PlaySession.date.desc(), models.PlaySession.id.desc()).limit(limit))).all()
 
 # --- User Stats CRUD ---
-def get_user_stats(db: Session, user_id: int):
-    collection_count = db.query(models.UserCollection).filter(models.UserCollection.user_id == user_id).count()
-    wishlist_count = db.query(models.Wishlist).filter(models.Wishlist.user_id == user_id).count()
-    plays_count = db.query(models.PlaySession).filter(models.PlaySession.owner_id == user_id).count()
-    return {"collection_count": collection_count, "wishlist_count": wishlist_count, "plays_count": plays_count}
-
-def get_all_user_plays(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.PlaySession).filter(models.PlaySession.owner_id == user_id).order_by(models.PlaySession.date.desc()).offset(skip).limit(limit).all()
+async def get_user_stats(db: AsyncSession, user_id: int):
+    """A primary-key lookup of the counters kept by _bump_user_stats."""
+    stats = await db.get(models.UserStats, user_id)
+    if stats is None:
+        return {"collection_count": 0, "wishlist_count": 0, "plays_count": 0}
+    return {
+        "collection_count": stats.collection_count,
+        "wishlist_count": stats.wishlist_count,
+        "plays_count": stats.plays_count,
+    }
+
+async def get_all_user_plays(db: AsyncSession, user_id: int, limit: int = 100, after: Optional[Tuple[date, int]] = None, skip: int = 0):
+    """Newest first, keyset-paginated on (date, id). `skip` is the legacy offset, still honoured past `after`."""
+    query = select(models.PlaySession).join(models.Game).options(
+        contains_eager(models.PlaySession.game)
+    ).filter(
+        models.PlaySession.owner_id == user_id
+    )
+    if after is not None:
+        query = query.filter(tuple_(models.PlaySession.date, models.PlaySession.id) < tuple_(*after))
+    return (await db.scalars(query.order_by(models.PlaySession.date.desc(), models.PlaySession.id.desc()).offset(skip).limit(limit))).all()
+
+# --- Play Analytics ---
+_PLAYER_SEPARATORS = re.compile(r"[,;\n]")
+
+def _split_players(players: Optional[str]) -> Dict[str, str]:
+    """Parses PlaySession.players ("Ann, Bob") into {lower-cased key: name as written}."""
+    parsed = {}
+    for part in _PLAYER_SEPARATORS.split(players or ""):
+        name = " ".join(part.split())
+        if name:
+            parsed.setdefault(name.lower(), name)
+    return parsed
+
+async def _record_play_rollups(db: AsyncSession, user_id: int, plays: List[dict]):
+    """Folds new plays into the analytics rollups: one multi-row upsert per rollup table."""
+    days: Dict[date, int] = {}
+    months: Dict[date, int] = {}
+    games: Dict[int, dict] = {}
+    co_players: Dict[str, dict] = {}
+    for play in plays:
+        play_date, rating = play["date"], play["rating"]
+        days[play_date] = days.get(play_date, 0) + 1
+        months[play_date.replace(day=1)] = months.get(play_date.replace(day=1), 0) + 1
+        game = games.setdefault(play["game_id"], {
+            "user_id": user_id, "game_id": play["game_id"], "play_count": 0,
+            "rating_sum": 0, "rating_count": 0, "last_played": play_date,
+        })
+        game["play_count"] += 1
+        if rating is not None:
+            game["rating_sum"] += rating
+            game["rating_count"] += 1
+        game["last_played"] = max(game["last_played"], play_date)
+        for key, name in _split_players(play["players"]).items():
+            co_player = co_players.setdefault(key, {"user_id": user_id, "player": key, "name": name, "play_count": 0})
+            co_player["play_count"] += 1
+
+    await _increment(db, models.PlayDayRollup,
+               [{"user_id": user_id, "date": day, "play_count": n} for day, n in days.items()],
+               keys=("user_id", "date"), counters=("play_count",))
+    await _increment(db, models.PlayMonthRollup,
+               [{"user_id": user_id, "month": month, "play_count": n} for month, n in months.items()],
+               keys=("user_id", "month"), counters=("play_count",))
+    await _increment(db, models.PlayGameRollup, list(games.values()),
+               keys=("user_id", "game_id"), counters=("play_count", "rating_sum", "rating_count"),
+               latest=("last_played",))
+    await _increment(db, models.PlayCoPlayerRollup, list(co_players.values()),
+               keys=("user_id", "player"), counters=("play_count",))
+
+def _month_start(db: AsyncSession, column):
+    if _dialect_name(db) == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
+
+async def rebuild_play_rollups(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """
+    Recomputes the analytics rollups from play_sessions, for one user or for
+    everyone. Day, month and game rollups are built with set-based
+    INSERT ... SELECT ... GROUP BY statements; co-players are parsed while
+    streaming the players column. Returns the number of plays folded in.
+    """
+    plays = models.PlaySession
+
+    def scoped(query):
+        return query if user_id is None else query.filter(plays.owner_id == user_id)
+
+    for model in (models.PlayDayRollup, models.PlayMonthRollup, models.PlayGameRollup, models.PlayCoPlayerRollup):
+        stmt = delete(model)
+        if user_id is not None:
+            stmt = stmt.filter(model.user_id == user_id)
+        await db.execute(stmt, execution_options={"synchronize_session": False})
+
+    month = _month_start(db, plays.date)
+    await db.execute(insert(models.PlayDayRollup).from_select(
+        ["user_id", "date", "play_count"],
+        scoped(select(plays.owner_id, plays.date, func.count())).group_by(plays.owner_id, plays.date),
+    ))
+    await db.execute(insert(models.PlayMonthRollup).from_select(
+        ["user_id", "month", "play_count"],
+        scoped(select(plays.owner_id, month, func.count())).group_by(plays.owner_id, month),
+    ))
+    await db.execute(insert(models.PlayGameRollup).from_select(
+        ["user_id", "game_id", "play_count", "rating_sum", "rating_count", "last_played"],
+        scoped(select(
+            plays.owner_id, plays.game_id, func.count(),
+            func.coalesce(func.sum(plays.rating), 0), func.count(plays.rating), func.max(plays.date),
+        )).group_by(plays.owner_id, plays.game_id),
+    ))
+
+    counts: Dict[Tuple[int, str], int] = {}
+    names: Dict[Tuple[int, str], str] = {}
+    streamed = await db.stream(
+        scoped(select(plays.owner_id, plays.players)).filter(plays.players.isnot(None)),
+        execution_options={"yield_per": 5000},
+    )
+    async for owner_id, players in streamed:
+        for key, name in _split_players(players).items():
+            counts[owner_id, key] = counts.get((owner_id, key), 0) + 1
+            names[owner_id, key] = min(names.get((owner_id, key), name), name)
+    rows = [
+        {"user_id": owner_id, "player": key, "name": names[owner_id, key], "play_count": count}
+        for (owner_id, key), count in counts.items()
+    ]
+    for start in range(0, len(rows), 5000):
+        await db.execute(insert(models.PlayCoPlayerRollup), rows[start:start + 5000])
+
+    return await db.scalar(scoped(select(func.count(plays.id))))
+
+def _play_streaks(days: List[date], today: Optional[date] = None) -> dict:
+    """Longest run of consecutive play days, and the run still going today (or yesterday)."""
+    today = today or date.today()
+    longest, longest_start, longest_end = 0, None, None
+    run, run_start, previous = 0, None, None
+    for day in days:
+        if previous is not None and day == previous + timedelta(days=1):
+            run += 1
+        else:
+            run, run_start = 1, day
+        if run > longest:
+            longest, longest_start, longest_end = run, run_start, day
+        previous = day
+    current = run if previous is not None and previous >= today - timedelta(days=1) else 0
+    return {"current": current, "longest": longest, "longest_start": longest_start, "longest_end": longest_end}
+
+def _h_index(play_counts: Iterable[int]) -> int:
+    """Largest h such that h different games have each been played at least h times."""
+    h = 0
+    for rank, plays in enumerate(sorted(play_counts, reverse=True), start=1):
+        if plays < rank:
+            break
+        h = rank
+    return h
+
+async def get_play_analytics(db: AsyncSession, user_id: int, top: int = 10) -> dict:
+    """
+    Everything /plays/analytics returns, read from the rollup tables only: one
+    primary-key range scan per rollup, however many plays the user has logged.
+    """
+    months = (await db.scalars(select(models.PlayMonthRollup).filter(
+        models.PlayMonthRollup.user_id == user_id
+    ).order_by(models.PlayMonthRollup.month))).all()
+    game_rollups = (await db.scalars(select(models.PlayGameRollup).join(models.Game).options(
+        contains_eager(models.PlayGameRollup.game)
+    ).filter(models.PlayGameRollup.user_id == user_id))).all()
+    days = (await db.scalars(select(models.PlayDayRollup.date).filter(
+        models.PlayDayRollup.user_id == user_id
+    ).order_by(models.PlayDayRollup.date))).all()
+    co_players = (await db.scalars(select(models.PlayCoPlayerRollup).filter(
+        models.PlayCoPlayerRollup.user_id == user_id
+    ).order_by(models.PlayCoPlayerRollup.play_count.desc(), models.PlayCoPlayerRollup.name).limit(top))).all()
+
+    games = [
+        {
+            "game_id": rollup.game_id,
+            "bgg_id": rollup.game.bgg_id,
+            "title": rollup.game.title,
+            "plays": rollup.play_count,
+            "average_rating": rollup.rating_sum / rollup.rating_count if rollup.rating_count else None,
+            "last_played": rollup.last_played,
+        }
+        for rollup in game_rollups
+    ]
+    return {
+        "total_plays": sum(month.play_count for month in months),
+        "plays_per_month": [{"month": month.month.strftime("%Y-%m"), "plays": month.play_count} for month in months],
+        "most_played": sorted(games, key=lambda game: (-game["plays"], game["title"]))[:top],
+        "average_ratings": sorted(
+            (game for game in games if game["average_rating"] is not None),
+            key=lambda game: (-game["average_rating"], game["title"]),
+        ),
+        "streaks": _play_streaks(days),
+        "h_index": _h_index(game["plays"] for game in games),
+        "co_players": [{"name": co_player.name, "plays": co_player.play_count} for co_player in co_players],
+    }
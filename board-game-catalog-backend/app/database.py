@@ -1,18 +1,75 @@
 # app/database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
+from app.core.pool_monitor import PoolMonitor
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The app talks to the database through async drivers, so a slow query parks a
+# coroutine instead of a threadpool thread. Alembic keeps using the sync URL.
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    """Swaps the driver of a plain or sync URL (postgresql://, postgresql+psycopg2://) for its async one."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _set_statement_timeout(dbapi_connection, connection_record):
+    # Outside a transaction, or the pool's reset-on-return would roll the SET back.
+    autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET statement_timeout = {int(settings.db_statement_timeout_ms)}")
+    cursor.close()
+    dbapi_connection.autocommit = autocommit
+
+def create_db_engine(url: Optional[str] = None, *, asynchronous: bool = True, monitor: Optional[PoolMonitor] = None):
+    """
+    Builds an engine with the pool, pre-ping, recycle and statement timeout
+    from settings. The app uses the async default; scripts that stay sync pass
+    asynchronous=False. Pass a monitor to record checkout waits and saturation.
+    """
+    url = url or settings.database_url
+    parsed = make_url(async_database_url(url) if asynchronous else url)
+    options = {}
+    # In-memory SQLite is one connection that can't be pooled.
+    if not _is_memory_sqlite(parsed):
+        pool_class = AsyncAdaptedQueuePool if asynchronous else QueuePool
+        options.update(
+            poolclass=monitor.instrument(pool_class) if monitor else pool_class,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+        if monitor:
+            monitor.capacity = settings.db_pool_size + settings.db_max_overflow
+    engine = (create_async_engine if asynchronous else create_engine)(parsed, **options)
+    if parsed.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms:
+        event.listen(engine.sync_engine if asynchronous else engine, "connect", _set_statement_timeout)
+    return engine
+
+pool_monitor = PoolMonitor(slow_checkout_seconds=settings.db_pool_slow_checkout_seconds)
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL, monitor=pool_monitor)
+# Each request commits once at the end; keeping objects loaded past that commit
+# lets the response be serialized without re-selecting every row.
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,12 +1,35 @@
 # app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app import metrics, tracing
 from app.api.endpoints import users, games, wishlists, plays # ADD 'plays' here
+from app.config import settings
+from app.core.security import password_hasher
+from app.database import engine, pool_monitor
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services.bgg_api import bgg_client
+from app.services.game_refresher import game_refresher
+from app.services.game_resolver import game_resolver
+from app.services.search_cache import search_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.game_refresh_enabled:
+        game_refresher.start()
+    yield
+    await game_refresher.stop()
+    # Release the pooled BGG connections on shutdown.
+    await bgg_client.aclose()
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     title="Board Game Catalog API",
     description="API for managing board game collections and wishlists.",
     version="0.2.0-alpha", # Bumped version for new feature
+    lifespan=lifespan,
 )
 
 origins = [
@@ -14,13 +37,24 @@ origins = [
     "http://localhost:5173",
 ]
 
+# Innermost, so CORS headers are still added to debug responses.
+app.add_middleware(tracing.SQLTraceMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Link", "X-SQL-Count", "X-SQL-Time-Ms", "X-SQL-Repeated", "X-Debug-Status"],
 )
+# Outermost, so the recorded latency includes every other middleware.
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.instrument_engine(engine)
+tracing.instrument_engine(engine)
+metrics.registry.add_collector(metrics.game_resolver_collector(game_resolver))
+metrics.registry.add_collector(metrics.search_cache_collector(search_cache))
+metrics.registry.add_collector(metrics.pool_collector(pool_monitor))
 
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(games.router, prefix="/games", tags=["games"])
@@ -30,3 +64,8 @@ app.include_router(plays.router, prefix="/plays", tags=["plays"]) # ADD THIS LIN
 @app.get("/")
 def root():
     return {"message": "Welcome to the Board Game Catalog API!"}
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Prometheus scrape endpoint; values are per worker process."""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
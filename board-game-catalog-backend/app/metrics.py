@@ -0,0 +1,339 @@
+# app/metrics.py
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Everything is updated from the event loop thread, so recording a sample is a
+dict lookup plus an add; the lock is only taken the first time a label
+combination is seen. Counters that other components already keep (the game
+resolver, the search cache, the pool monitor) are read at scrape time through
+collectors instead of being counted twice. Each worker process reports its
+own values.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+from app.core import statement_timer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Sample]:
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, dict(zip(self.labelnames, values)))
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterable[Sample]:
+        yield name, labels, self.value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Non-cumulative per bucket, with a trailing +Inf bucket; summed at scrape time.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterable[Sample]:
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            yield name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+        yield name + "_sum", labels, self.sum
+        yield name + "_count", labels, cumulative
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]):
+        """`collector()` yields (name, type, help, samples) for values read at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name, kind, documentation, samples):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for metric in self._metrics:
+            family(metric.name, metric.kind, metric.documentation, metric.samples())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                family(name, kind, documentation, samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- HTTP ---
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"))
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method", "route"))
+
+# --- Database ---
+db_queries = registry.counter("db_queries_total", "SQL statements executed.")
+db_query_duration = registry.histogram("db_query_duration_seconds", "SQL statement execution time.")
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements issued while serving one request.", ("route",),
+    buckets=QUERY_COUNT_BUCKETS)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds", "Time spent in SQL while serving one request.", ("route",))
+
+# --- BGG ---
+bgg_request_duration = registry.histogram(
+    "bgg_request_duration_seconds", "BGG HTTP attempt latency, until response headers.", ("endpoint",))
+bgg_responses = registry.counter(
+    "bgg_responses_total", "BGG HTTP attempts by status code (or transport_error).", ("endpoint", "status"))
+bgg_errors = registry.counter(
+    "bgg_errors_total", "BGG calls that failed, after retries, by kind.", ("endpoint", "kind"))
+
+
+class _RequestDB:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_request_db: ContextVar[Optional[_RequestDB]] = ContextVar("metrics_request_db", default=None)
+
+
+_db_queries = db_queries.labels()
+_db_query_duration = db_query_duration.labels()
+
+
+def _record_statement(statement, parameters, elapsed, executemany):
+    _db_queries.inc()
+    _db_query_duration.observe(elapsed)
+    current = _request_db.get()
+    if current is not None:
+        current.queries += 1
+        current.seconds += elapsed
+
+
+def instrument_engine(engine):
+    """Counts and times every statement the engine runs, globally and per request."""
+    statement_timer.observe(engine, _record_statement)
+
+
+def game_resolver_collector(resolver):
+    """Game lookups (get_or_create_game) by the tier that answered them, from GameResolver.stats()."""
+    def collect():
+        stats = resolver.stats()
+        yield "game_lookups_total", "counter", "Game lookups by the tier that answered them.", [
+            ("game_lookups_total", {"tier": tier}, stats[key])
+            for tier, key in (("memory", "memory_hits"), ("db", "db_hits"),
+                              ("bgg", "bgg_fetches"), ("coalesced", "coalesced"))
+        ]
+        yield "game_lookups_not_found_total", "counter", "Game lookups BGG did not know.", [
+            ("game_lookups_not_found_total", {}, stats["not_found"])]
+        yield "game_lookup_memory_hit_ratio", "gauge", "Share of game lookups answered from memory.", [
+            ("game_lookup_memory_hit_ratio", {}, stats["memory_hit_ratio"])]
+        yield "game_cache_entries", "gauge", "Games held in the in-process cache.", [
+            ("game_cache_entries", {}, stats["cached_games"])]
+    return collect
+
+
+def search_cache_collector(cache):
+    """BGG search lookups by how they were answered, from SearchCache.stats()."""
+    def collect():
+        stats = cache.stats()
+        yield "search_cache_lookups_total", "counter", "BGG search lookups by how the cache answered them.", [
+            ("search_cache_lookups_total", {"result": result}, stats[key])
+            for result, key in (("hit", "hits"), ("prefix_hit", "prefix_hits"), ("miss", "misses"))
+        ]
+        yield "search_cache_hit_ratio", "gauge", "Share of BGG search lookups answered from the cache.", [
+            ("search_cache_hit_ratio", {}, stats["hit_ratio"])]
+        yield "search_cache_entries", "gauge", "Search results held in the in-process cache.", [
+            ("search_cache_entries", {}, stats["entries"])]
+    return collect
+
+
+def pool_collector(monitor):
+    """Connection pool checkout statistics from a PoolMonitor."""
+    def collect():
+        stats = monitor.stats()
+        for name, kind, key, documentation in (
+            ("db_pool_checkouts_total", "counter", "checkouts", "Connections checked out of the pool."),
+            ("db_pool_slow_checkouts_total", "counter", "slow_checkouts", "Checkouts that waited longer than the slow threshold."),
+            ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that gave up waiting for a connection."),
+            ("db_pool_wait_seconds_max", "gauge", "wait_seconds_max", "Longest checkout wait so far."),
+            ("db_pool_in_use", "gauge", "in_use", "Connections currently checked out."),
+            ("db_pool_in_use_peak", "gauge", "in_use_peak", "Most connections checked out at once."),
+            ("db_pool_saturation", "gauge", "saturation", "Connections in use over pool size plus overflow."),
+        ):
+            if stats[key] is not None:
+                yield name, kind, documentation, [(name, {}, stats[key])]
+    return collect
+
+
+def bgg_endpoint(path: str) -> str:
+    """"/search" -> "search"; the label used to split BGG metrics by API."""
+    return path.strip("/").split("/")[0] or "unknown"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, in-flight requests and per-request
+    DB usage under the matched route template (/plays/{game_id}), so path
+    parameters never become label values.
+    """
+
+    def __init__(self, app, router=None):
+        self.app = app
+        self.router = router
+
+    def _route(self, scope) -> str:
+        router = self.router or scope["app"].router
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", scope["path"])
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], self._route(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_flight = http_requests_in_flight.labels(method, route)
+        in_flight.inc()
+        db_usage = _RequestDB()
+        token = _request_db.set(db_usage)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db.reset(token)
+            in_flight.dec()
+            http_requests.labels(method, route, str(status["code"])).inc()
+            http_request_duration.labels(method, route).observe(elapsed)
+            db_queries_per_request.labels(route).observe(db_usage.queries)
+            db_time_per_request.labels(route).observe(db_usage.seconds)
@@ -1,5 +1,5 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -12,6 +12,8 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Embedded in access tokens; bumping it revokes every token issued before.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -19,6 +21,15 @@ class User(Base):
     wishlists = relationship("Wishlist", back_populates="owner")
     play_sessions = relationship("PlaySession", back_populates="owner") # Add this line
 
+class UserStats(Base):
+    """Per-user counters for /users/stats, kept current by the crud create/delete paths."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    collection_count = Column(Integer, nullable=False, default=0, server_default="0")
+    wishlist_count = Column(Integer, nullable=False, default=0, server_default="0")
+    plays_count = Column(Integer, nullable=False, default=0, server_default="0")
+
 class Game(Base):
     __tablename__ = "games"
 
@@ -46,6 +57,21 @@ class Game(Base):
     barcode_mappings = relationship("BarcodeMapping", back_populates="game")
     play_sessions = relationship("PlaySession", back_populates="game") # Add this line
 
+    # Local search indexes (Postgres only, see migration 3f9a2c7d1b64).
+    __table_args__ = (
+        Index("ix_games_title_trgm", "title", postgresql_using="gin",
+              postgresql_ops={"title": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_games_publisher_trgm", "publisher", postgresql_using="gin",
+              postgresql_ops={"publisher": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_games_search_tsv",
+              text("to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(publisher, ''))"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Background stale-game sweep (see crud.get_stale_games).
+        Index("ix_games_refreshed_at", func.coalesce(updated_at, created_at)),
+        Index("ix_games_never_refreshed_no_image", "id",
+              postgresql_where=text("updated_at IS NULL AND (thumbnail_url IS NULL OR thumbnail_url = '')")),
+    )
+
 class UserCollection(Base):
     __tablename__ = "user_collections"
 
@@ -64,6 +90,10 @@ class UserCollection(Base):
     owner = relationship("User", back_populates="collections")
     game = relationship("Game", back_populates="user_collections")
 
+    __table_args__ = (
+        Index("ix_user_collections_user_id_game_id", "user_id", "game_id", unique=True),
+    )
+
 class Wishlist(Base):
     __tablename__ = "wishlists"
 
@@ -79,6 +109,10 @@ class Wishlist(Base):
     owner = relationship("User", back_populates="wishlists")
     game = relationship("Game", back_populates="wishlist_entries")
 
+    __table_args__ = (
+        Index("ix_wishlists_user_id_game_id", "user_id", "game_id", unique=True),
+    )
+
 class BarcodeMapping(Base):
     __tablename__ = "barcode_mappings"
 
@@ -105,3 +139,45 @@ class PlaySession(Base):
 
     game = relationship("Game", back_populates="play_sessions")
     owner = relationship("User", back_populates="play_sessions")
+
+    __table_args__ = (
+        Index("ix_play_sessions_owner_id_game_id_date", "owner_id", "game_id", "date"),
+        Index("ix_play_sessions_owner_id_date_id", "owner_id", "date", "id"),
+    )
+
+# --- Play analytics rollups ---
+# Maintained incrementally by crud.create_play_session and rebuilt in bulk by
+# crud.rebuild_play_rollups, so /plays/analytics never scans play_sessions.
+class PlayDayRollup(Base):
+    __tablename__ = "play_day_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    play_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class PlayMonthRollup(Base):
+    __tablename__ = "play_month_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True) # First day of the month
+    play_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class PlayGameRollup(Base):
+    __tablename__ = "play_game_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    play_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_played = Column(Date)
+
+    game = relationship("Game")
+
+class PlayCoPlayerRollup(Base):
+    __tablename__ = "play_coplayer_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    player = Column(String, primary_key=True) # Lower-cased, whitespace-normalized name
+    name = Column(String, nullable=False) # As first written
+    play_count = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,58 @@
+# app/pagination.py
+import base64
+import json
+from datetime import date
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encodes the sort key of the last row on a page as an opaque cursor."""
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], types: Sequence[type]) -> Optional[Tuple]:
+    """Decodes a cursor back into a typed sort key; raises a 400 if it was tampered with."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of cursor fields")
+        return tuple(
+            date.fromisoformat(value) if kind is date else kind(value)
+            for kind, value in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+def paginate(
+    rows: List[Any],
+    limit: int,
+    sort_key: Callable[[Any], Sequence[Any]],
+    request: Request,
+    response: Response,
+) -> List[Any]:
+    """
+    Trims a `limit + 1` row fetch down to one page. When there is a further
+    page, its cursor is returned in the X-Next-Cursor header and a Link header,
+    so list endpoints keep returning plain JSON arrays.
+    """
+    if len(rows) <= limit:
+        return rows
+    page = rows[:limit]
+    cursor = encode_cursor(sort_key(page[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    # The cursor already points past any legacy offset, so it must not be applied twice.
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=cursor, limit=limit)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return page
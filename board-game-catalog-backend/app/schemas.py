@@ -53,8 +53,14 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    token_version: Optional[int] = None
 
 class UserStats(BaseModel):
     collection_count: int
@@ -124,3 +130,35 @@ class PlaySession(PlaySessionBase):
 
 class PlaySessionWithGame(PlaySession):
     game: GameInDB
+
+# --- Play Analytics Schemas ---
+class MonthlyPlays(BaseModel):
+    month: str # YYYY-MM
+    plays: int
+
+class GamePlayStats(BaseModel):
+    game_id: int
+    bgg_id: int
+    title: str
+    plays: int
+    average_rating: Optional[float] = None
+    last_played: Optional[date] = None
+
+class PlayStreaks(BaseModel):
+    current: int
+    longest: int
+    longest_start: Optional[date] = None
+    longest_end: Optional[date] = None
+
+class CoPlayer(BaseModel):
+    name: str
+    plays: int
+
+class PlayAnalytics(BaseModel):
+    total_plays: int
+    plays_per_month: List[MonthlyPlays]
+    most_played: List[GamePlayStats]
+    average_ratings: List[GamePlayStats]
+    streaks: PlayStreaks
+    h_index: int
+    co_players: List[CoPlayer]
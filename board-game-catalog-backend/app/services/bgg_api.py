@@ -1,54 +1,277 @@
 # app/services/bgg_api.py
 
-import requests
-import xml.etree.ElementTree as ET
+import asyncio
+import random
 import time
+import xml.etree.ElementTree as ET
+from contextlib import aclosing, asynccontextmanager
+from typing import Optional
+
+import httpx
+
+from app import metrics
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.rate_limiter import Priority, TokenBucketLimiter
 
 BGG_API_URL = "https://www.boardgamegeek.com/xmlapi2"
 
+# Default spacing between BGG calls, to stay polite to BGG.
+BGG_MIN_REQUEST_INTERVAL = 0.25
+
+# BGG rejects /thing requests asking for more than 20 IDs at once.
+BGG_THING_BATCH_SIZE = 20
+
+
+# Statuses worth retrying: 202 means BGG queued the request, 429 is throttling.
+RETRYABLE_STATUS_CODES = {202, 429, 500, 502, 503, 504}
+
 
 class BGGAPIError(Exception):
-    pass
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
 
 
-def search_bgg_games(query):
-    try:
-        response = requests.get(f"{BGG_API_URL}/search", params={"query": query, "type": "boardgame"})
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise BGGAPIError(f"BGG API search request failed: {e}")
+class BGGUnavailableError(BGGAPIError):
+    """
+    Raised without contacting BGG: the circuit breaker is open, or no request
+    slot freed up before the call's deadline. Callers should fall back to
+    local data.
+    """
 
-    root = ET.fromstring(response.content)
-    results = []
-    for item in root.findall(".//item"):
-        bgg_id = item.get("id")
-        title_element = item.find("name")
-        year_element = item.find("yearpublished")
-        if bgg_id and title_element is not None:
-            title = title_element.get("value")
-            year_published = year_element.get("value") if year_element is not None else None
-            results.append({
-                "bgg_id": int(bgg_id),
-                "title": title,
-                "year_published": int(year_published) if year_published and year_published.isdigit() else None
-            })
-    return results
+    def __init__(self, message: str, reason: str = "circuit_open"):
+        super().__init__(message)
+        self.reason = reason
 
 
-def get_bgg_game_details(bgg_id):
-    time.sleep(0.25)  # Rate-limiting to be polite to BGG
+class BGGClient:
+    """
+    Asyncio-native BGG client.
+    Shares one pooled keep-alive connection set across all requests, and sends
+    every call through one token-bucket limiter so the whole process (or every
+    process sharing the limiter's state file) stays within BGG's rate limit.
+    Retryable answers are retried with jittered backoff inside a per-call
+    deadline; repeated failures open a circuit breaker so callers fail fast.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BGG_API_URL,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        limiter: Optional[TokenBucketLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deadline: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.base_url = base_url
+        self.read_timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.limiter = limiter or TokenBucketLimiter(rate=1 / BGG_MIN_REQUEST_INTERVAL)
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=self.limits,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter keeps many waiting callers from retrying in lockstep.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _open(self, path: str, params: dict, priority: Priority) -> httpx.Response:
+        """Sends the request with retries; returns a successful response whose body is not yet read."""
+        client = self._get_client()
+        endpoint = metrics.bgg_endpoint(path)
+        latency = metrics.bgg_request_duration.labels(endpoint)
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            response = None
+            try:
+                # Checked before queueing for a token too, so an open breaker fails
+                # fast instead of spending tokens other callers could use.
+                if not self.breaker.would_allow():
+                    raise BGGUnavailableError("BGG is currently unavailable; try again shortly.")
+                remaining = deadline - time.monotonic()
+                try:
+                    await asyncio.wait_for(self.limiter.acquire(priority), timeout=max(remaining, 0))
+                except OSError as e:
+                    raise BGGUnavailableError(f"BGG rate limiter is unavailable: {e}", reason="rate_limiter") from e
+                if not self.breaker.allow():
+                    raise BGGUnavailableError("BGG is currently unavailable; try again shortly.")
+                remaining = deadline - time.monotonic()
+                timeout = httpx.Timeout(
+                    max(min(self.read_timeout, remaining), 0.1),
+                    connect=max(min(self.connect_timeout, remaining), 0.1),
+                )
+                request = client.build_request("GET", path, params=params, timeout=timeout)
+                started = time.perf_counter()
+                try:
+                    response = await client.send(request, stream=True)
+                finally:
+                    latency.observe(time.perf_counter() - started)
+            except asyncio.TimeoutError:
+                raise BGGUnavailableError(f"Timed out waiting for a BGG request slot for {path}", reason="no_slot")
+            except httpx.TransportError as e:
+                metrics.bgg_responses.labels(endpoint, "transport_error").inc()
+                self.breaker.record_failure()
+                problem = str(e) or type(e).__name__
+            else:
+                metrics.bgg_responses.labels(endpoint, str(response.status_code)).inc()
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # Anything other than a retryable status means BGG itself is up.
+                    self.breaker.record_success()
+                    if response.is_success:
+                        return response
+                    await response.aclose()
+                    raise BGGAPIError(
+                        f"BGG request to {path} failed: HTTP {response.status_code}",
+                        status_code=response.status_code,
+                    )
+                await response.aclose()
+                if response.status_code == 202:
+                    # Queued, not failing: BGG is up. This also settles a half-open trial.
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                problem = f"HTTP {response.status_code}"
+
+            attempt += 1
+            delay = self._backoff(attempt, response)
+            if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                raise BGGAPIError(f"BGG request to {path} failed after {attempt} attempt(s): {problem}")
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def stream(self, path: str, params: dict, priority: Priority = Priority.INTERACTIVE):
+        """Opens a streamed BGG response; the body is read incrementally by the caller."""
+        endpoint = metrics.bgg_endpoint(path)
+        try:
+            response = await self._open(path, params, priority)
+        except BGGUnavailableError as e:
+            metrics.bgg_errors.labels(endpoint, e.reason).inc()
+            raise
+        except BGGAPIError as e:
+            metrics.bgg_errors.labels(endpoint, "http" if e.status_code else "failed").inc()
+            raise
+        try:
+            yield response
+        except httpx.HTTPError as e:
+            metrics.bgg_errors.labels(endpoint, "interrupted").inc()
+            raise BGGAPIError(f"BGG response from {path} was interrupted: {e}")
+        except ET.ParseError as e:
+            metrics.bgg_errors.labels(endpoint, "malformed").inc()
+            raise BGGAPIError(f"BGG returned malformed XML from {path}: {e}")
+        finally:
+            await response.aclose()
 
-    try:
-        response = requests.get(f"{BGG_API_URL}/thing", params={"id": bgg_id, "stats": 1})
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise BGGAPIError(f"BGG API thing request failed for ID {bgg_id}: {e}")
 
-    root = ET.fromstring(response.content)
-    item = root.find("item")
-    if not item:
+async def iter_xml_items(response: httpx.Response):
+    """
+    Incrementally parses a streamed BGG response, yielding each top-level
+    <item> element as soon as it is complete. Consumed items are cleared from
+    the tree, so memory stays flat however many items BGG returns.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+    async for chunk in response.aiter_bytes():
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = element
+                continue
+            depth -= 1
+            if depth == 1 and element.tag == "item":
+                yield element
+                root.clear()
+    parser.close()
+
+
+bgg_client = BGGClient(
+    base_url=settings.bgg_api_url,
+    timeout=settings.bgg_timeout_seconds,
+    deadline=settings.bgg_deadline_seconds,
+    max_retries=settings.bgg_max_retries,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.bgg_breaker_failure_threshold,
+        reset_timeout=settings.bgg_breaker_reset_seconds,
+    ),
+    limiter=TokenBucketLimiter(
+        rate=settings.bgg_rate_per_second,
+        capacity=settings.bgg_rate_burst,
+        state_file=settings.bgg_rate_limit_file,
+    ),
+)
+
+
+def _parse_search_item(item):
+    bgg_id = item.get("id")
+    title_element = item.find("name")
+    year_element = item.find("yearpublished")
+    if not bgg_id or title_element is None:
         return None
+    year_published = year_element.get("value") if year_element is not None else None
+    return {
+        "bgg_id": int(bgg_id),
+        "title": title_element.get("value"),
+        "year_published": int(year_published) if year_published and year_published.isdigit() else None
+    }
+
+
+async def iter_search_results(query, priority: Priority = Priority.INTERACTIVE):
+    """Yields BGG search results one by one while the response is still streaming in."""
+    params = {"query": query, "type": "boardgame"}
+    async with bgg_client.stream("/search", params=params, priority=priority) as response:
+        async with aclosing(iter_xml_items(response)) as items:
+            async for item in items:
+                result = _parse_search_item(item)
+                if result:
+                    yield result
+
+
+async def search_bgg_games(query, limit: Optional[int] = None, priority: Priority = Priority.INTERACTIVE):
+    """Collects search results, stopping the download early once `limit` results are in."""
+    results = []
+    async with aclosing(iter_search_results(query, priority=priority)) as stream:
+        async for result in stream:
+            results.append(result)
+            if limit is not None and len(results) >= limit:
+                break
+    return results
+
 
+def _parse_thing_item(item):
     def get_value(element, attribute='value'):
         return element.get(attribute) if element is not None else None
 
@@ -71,6 +294,7 @@ def get_bgg_game_details(bgg_id):
                     .replace('&mdash;', '—'))
         return None
 
+    bgg_id = int(item.get("id"))
     stats = item.find("statistics/ratings")
 
     details = {
@@ -86,10 +310,40 @@ def get_bgg_game_details(bgg_id):
         "box_art_url": get_text(item.find("image")),
         "thumbnail_url": get_text(item.find("thumbnail")),
         "description": sanitize_description(get_text(item.find("description"))),
-        "bgg_rating": get_value(stats.find("average")),
-        "bgg_num_voters": get_int_value(stats.find("usersrated")),
+        "bgg_rating": get_value(stats.find("average")) if stats is not None else None,
+        "bgg_num_voters": get_int_value(stats.find("usersrated")) if stats is not None else None,
         "bgg_link": f"https://boardgamegeek.com/boardgame/{bgg_id}"
     }
 
     return details
 
+
+async def iter_games_details(bgg_ids, priority: Priority = Priority.INTERACTIVE):
+    """
+    Yields details for many games, BGG_THING_BATCH_SIZE IDs per /thing call,
+    parsing each <item> as it arrives. IDs BGG doesn't know are simply skipped.
+    """
+    unique_ids = list(dict.fromkeys(int(bgg_id) for bgg_id in bgg_ids))
+    for start in range(0, len(unique_ids), BGG_THING_BATCH_SIZE):
+        chunk = unique_ids[start:start + BGG_THING_BATCH_SIZE]
+        id_param = ",".join(str(bgg_id) for bgg_id in chunk)
+        params = {"id": id_param, "stats": 1}
+        async with bgg_client.stream("/thing", params=params, priority=priority) as response:
+            async with aclosing(iter_xml_items(response)) as items:
+                async for item in items:
+                    if item.get("id") and item.get("id").isdigit():
+                        yield _parse_thing_item(item)
+
+
+async def get_bgg_games_details(bgg_ids, priority: Priority = Priority.INTERACTIVE):
+    """Returns a dict of bgg_id -> details for every ID BGG knows."""
+    results = {}
+    async with aclosing(iter_games_details(bgg_ids, priority=priority)) as stream:
+        async for details in stream:
+            results[details["bgg_id"]] = details
+    return results
+
+
+async def get_bgg_game_details(bgg_id, priority: Priority = Priority.INTERACTIVE):
+    details = await get_bgg_games_details([bgg_id], priority=priority)
+    return details.get(int(bgg_id))
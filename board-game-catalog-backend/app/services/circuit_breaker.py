@@ -0,0 +1,62 @@
+# app/services/circuit_breaker.py
+
+import time
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open circuit breaker.
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds; then a single trial call is let
+    through, and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def would_allow(self) -> bool:
+        """Whether allow() would let a call through right now, without claiming the half-open trial."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            # A trial that never reported back (e.g. it was cancelled) doesn't block forever.
+            return not self._trial_in_flight or time.monotonic() - self._trial_started >= self.reset_timeout
+        return False
+
+    def allow(self) -> bool:
+        if not self.would_allow():
+            return False
+        if self.state == self.HALF_OPEN:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            self._trial_started = time.monotonic()
+        return True
+
+    def record_success(self):
+        self._failures = 0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
@@ -0,0 +1,128 @@
+# app/services/game_refresher.py
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas
+from app.config import settings
+from app.database import SessionLocal
+from app.services import bgg_api
+from app.services.game_resolver import GameResolver, game_resolver
+from app.services.rate_limiter import Priority
+
+
+class GameRefresher:
+    """
+    Keeps cached games fresh in the background (stale-while-revalidate).
+    Requests are always answered from local data; games whose data is older
+    than the TTL (or that were stored without images) are re-fetched from BGG
+    here, in small batches, off the request path. Every worker runs one; each
+    batch is claimed in the database first, so they never refresh the same game.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[..., AsyncSession],
+        resolver: GameResolver,
+        ttl: timedelta,
+        interval: float = 300.0,
+        lease: timedelta = timedelta(minutes=10),
+        batch_size: int = bgg_api.BGG_THING_BATCH_SIZE,
+    ):
+        self._session_factory = session_factory
+        self._resolver = resolver
+        self.ttl = ttl
+        self.interval = interval
+        self.lease = lease
+        self.batch_size = batch_size
+        self._requested: dict = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_stale(self, db_game: models.Game) -> bool:
+        if not db_game.thumbnail_url and db_game.updated_at is None:
+            return True
+        refreshed_at = db_game.updated_at or db_game.created_at
+        if refreshed_at is None:
+            return True
+        if refreshed_at.tzinfo is None:
+            refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+        return refreshed_at < datetime.now(timezone.utc) - self.ttl
+
+    def check(self, db_game: models.Game):
+        """Queues the game for a background refresh if it is stale. Never blocks."""
+        if self.is_stale(db_game):
+            self.request_refresh(db_game.bgg_id)
+
+    def request_refresh(self, bgg_id: int):
+        self._requested[bgg_id] = None
+        if len(self._requested) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # Keep going while there is a full batch of work, then go back to sleep.
+                while await self.refresh_once() >= self.batch_size:
+                    await asyncio.sleep(0)
+            except Exception as e:
+                # Never let one bad pass kill the worker; the next interval retries.
+                print(f"Background game refresh failed, will retry later: {e}")
+
+    async def refresh_once(self) -> int:
+        """Refreshes one batch of stale games. Returns how many games were checked."""
+        requested = list(self._requested)[:self.batch_size]
+        for bgg_id in requested:
+            self._requested.pop(bgg_id, None)
+
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        # Claimed in a transaction of its own, so no row stays locked while BGG answers.
+        async with self._session_factory() as db:
+            bgg_ids = await crud.claim_stale_games(
+                db, cutoff=cutoff, lease=self.lease, limit=self.batch_size, bgg_ids=requested
+            )
+            await db.commit()
+        if not bgg_ids:
+            return 0
+
+        bgg_details = await bgg_api.get_bgg_games_details(bgg_ids, priority=Priority.BACKGROUND)
+        async with self._session_factory() as db:
+            db_games = await crud.create_games(db, [schemas.GameCreate(**details) for details in bgg_details.values()])
+            for db_game in db_games:
+                self._resolver.remember(db_game)
+            # Games BGG no longer returns are marked checked, so they aren't retried every pass.
+            gone = [bgg_id for bgg_id in bgg_ids if bgg_id not in bgg_details]
+            if gone:
+                await crud.touch_games(db, bgg_ids=gone)
+            await db.commit()
+        return len(bgg_ids)
+
+game_refresher = GameRefresher(
+    SessionLocal,
+    game_resolver,
+    ttl=timedelta(hours=settings.game_refresh_ttl_hours),
+    interval=settings.game_refresh_interval_seconds,
+    lease=timedelta(seconds=settings.game_refresh_lease_seconds),
+)
+game_resolver.refresh_hook = game_refresher.check
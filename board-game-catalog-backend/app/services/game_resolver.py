@@ -0,0 +1,224 @@
+# app/services/game_resolver.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas
+from app.config import settings
+from app.database import SessionLocal
+from app.services import bgg_api
+
+
+class GameNotFoundError(Exception):
+    pass
+
+
+class LRUCache:
+    """
+    A small size-bounded LRU mapping whose entries also expire `ttl` seconds
+    after they were stored. Not thread-safe; used from the event loop only.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[int, tuple]" = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class GameResolver:
+    """
+    Resolves a BGG ID to a local game row through three tiers:
+    an in-process LRU of hot games, the games table, then BGG itself.
+    Concurrent BGG misses for the same ID share one in-flight fetch.
+    Cached snapshots expire after `ttl` seconds. A refresh only updates the
+    cache of the worker that ran it, so other workers pick it up from the
+    games table once their copy expires.
+    """
+
+    def __init__(self, session_factory: Callable[..., AsyncSession], max_size: int = 1024,
+                 ttl: Optional[float] = None):
+        self._session_factory = session_factory
+        self._cache = LRUCache(max_size, ttl)
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.bgg_fetches = 0
+        self.coalesced = 0
+        self.not_found = 0
+        # Called with each game row read from the DB, so a background refresher
+        # can queue stale ones without delaying the request.
+        self.refresh_hook: Optional[Callable[[models.Game], None]] = None
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.bgg_fetches + self.coalesced
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "bgg_fetches": self.bgg_fetches,
+            "coalesced": self.coalesced,
+            "not_found": self.not_found,
+            "cached_games": len(self._cache),
+            "memory_hit_ratio": self.memory_hits / lookups if lookups else 0.0,
+        }
+
+    def remember(self, db_game) -> schemas.GameInDB:
+        # Cache a detached snapshot; ORM rows are bound to the session that loaded them.
+        game = schemas.GameInDB.model_validate(db_game)
+        self._cache.put(game.bgg_id, game)
+        return game
+
+    def _check_freshness(self, db_game: models.Game):
+        if self.refresh_hook is not None:
+            self.refresh_hook(db_game)
+
+    def forget(self, bgg_id: int):
+        self._cache.pop(bgg_id)
+
+    async def resolve(self, db: AsyncSession, bgg_id: int) -> schemas.GameInDB:
+        game = self._cache.get(bgg_id)
+        if game is not None:
+            self.memory_hits += 1
+            return game
+
+        db_game = await crud.get_game_by_bgg_id(db, bgg_id=bgg_id)
+        if db_game:
+            self.db_hits += 1
+            self._check_freshness(db_game)
+            return self.remember(db_game)
+
+        return await self._fetch_once(bgg_id)
+
+    async def resolve_many(self, db: AsyncSession, bgg_ids: List[int]) -> List[schemas.GameInDB]:
+        """
+        Resolves many BGG IDs at once: one DB query for everything not in memory,
+        then batched BGG fetches for the rest. IDs BGG doesn't know are left out.
+        If any uncached ID couldn't be fetched (BGG unavailable or failing), the
+        BGG error is raised rather than reporting that game as missing.
+        """
+        bgg_ids = list(dict.fromkeys(bgg_ids))
+        found: Dict[int, schemas.GameInDB] = {}
+        for bgg_id in bgg_ids:
+            game = self._cache.get(bgg_id)
+            if game is not None:
+                self.memory_hits += 1
+                found[bgg_id] = game
+
+        missing = [bgg_id for bgg_id in bgg_ids if bgg_id not in found]
+        if missing:
+            for db_game in await crud.get_games_by_bgg_ids(db, missing):
+                self.db_hits += 1
+                self._check_freshness(db_game)
+                found[db_game.bgg_id] = self.remember(db_game)
+            missing = [bgg_id for bgg_id in missing if bgg_id not in found]
+
+        if missing:
+            pending = {}
+            to_fetch = []
+            for bgg_id in missing:
+                inflight = self._inflight.get(bgg_id)
+                if inflight is not None:
+                    self.coalesced += 1
+                    pending[bgg_id] = inflight
+                else:
+                    to_fetch.append(bgg_id)
+            if to_fetch:
+                self.bgg_fetches += len(to_fetch)
+                batch = asyncio.ensure_future(self._load_many_from_bgg(to_fetch))
+                for bgg_id in to_fetch:
+                    pending[bgg_id] = self._track(bgg_id, self._pick(batch, bgg_id))
+
+            results = await asyncio.gather(
+                *(asyncio.shield(f) for f in pending.values()), return_exceptions=True
+            )
+            for bgg_id, result in zip(pending, results):
+                if isinstance(result, GameNotFoundError):
+                    continue
+                if isinstance(result, BaseException):
+                    raise result
+                found[bgg_id] = result
+
+        return [found[bgg_id] for bgg_id in bgg_ids if bgg_id in found]
+
+    def _track(self, bgg_id: int, coro) -> asyncio.Future:
+        inflight = asyncio.ensure_future(coro)
+        self._inflight[bgg_id] = inflight
+        inflight.add_done_callback(lambda _: self._inflight.pop(bgg_id, None))
+        return inflight
+
+    async def _fetch_once(self, bgg_id: int) -> schemas.GameInDB:
+        inflight = self._inflight.get(bgg_id)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            self.bgg_fetches += 1
+            inflight = self._track(bgg_id, self._load_from_bgg(bgg_id))
+        # Shielded so one cancelled caller does not abort the fetch for the others.
+        return await asyncio.shield(inflight)
+
+    async def _pick(self, batch: asyncio.Future, bgg_id: int) -> schemas.GameInDB:
+        games = await batch
+        if bgg_id not in games:
+            self.not_found += 1
+            raise GameNotFoundError(f"Game with BGG ID {bgg_id} not found.")
+        return games[bgg_id]
+
+    async def _load_many_from_bgg(self, bgg_ids: List[int]) -> Dict[int, schemas.GameInDB]:
+        bgg_details = await bgg_api.get_bgg_games_details(bgg_ids)
+        if not bgg_details:
+            return {}
+
+        async with self._session_factory() as db:
+            db_games = await crud.create_games(db, [schemas.GameCreate(**details) for details in bgg_details.values()])
+            await db.commit()
+            return {db_game.bgg_id: self.remember(db_game) for db_game in db_games}
+
+    async def _load_from_bgg(self, bgg_id: int) -> schemas.GameInDB:
+        bgg_details = await bgg_api.get_bgg_game_details(bgg_id)
+        if not bgg_details:
+            self.not_found += 1
+            raise GameNotFoundError(f"Game with BGG ID {bgg_id} not found.")
+
+        # The fetch outlives any single request, so it writes through its own session.
+        async with self._session_factory() as db:
+            db_game = await crud.create_game(db=db, game=schemas.GameCreate(**bgg_details))
+            await db.commit()
+            return self.remember(db_game)
+
+
+game_resolver = GameResolver(
+    SessionLocal,
+    max_size=settings.game_cache_size,
+    ttl=min(settings.game_cache_ttl_seconds, settings.game_refresh_ttl_hours * 3600),
+)
@@ -0,0 +1,62 @@
+# app/services/principal_cache.py
+
+import threading
+from typing import Optional
+
+from sqlalchemy import event, inspect
+
+from app import models
+from app.config import settings
+from app.services.search_cache import TTLCache
+
+
+class PrincipalCache:
+    """
+    Short-lived in-process cache of authenticated users, keyed by user id, so
+    get_current_user can skip the users query for tokens it has seen recently.
+    Entries are dropped as soon as the user row is updated or deleted through
+    the ORM in this process; the TTL bounds how stale other workers can be.
+    Hits return a detached copy of the user, not the instance that was cached.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 60.0):
+        self.ttl = ttl
+        self._cache = TTLCache(max_size)
+        # Requests use it from the event loop, but the mapper listeners below fire
+        # from whichever thread flushes, so keep it thread-safe.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[models.User]:
+        with self._lock:
+            snapshot = self._cache.get(user_id)
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return models.User(**snapshot)
+
+    def remember(self, db_user: models.User):
+        snapshot = {attr.key: getattr(db_user, attr.key) for attr in inspect(models.User).column_attrs}
+        with self._lock:
+            self._cache.put(db_user.id, snapshot, self.ttl)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._cache.pop(user_id)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
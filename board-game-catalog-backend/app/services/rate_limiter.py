@@ -0,0 +1,140 @@
+# app/services/rate_limiter.py
+
+import asyncio
+import fcntl
+import heapq
+import itertools
+import json
+import os
+import time
+from enum import IntEnum
+from typing import List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    # Lower values are served first.
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class _LocalBucketState:
+    """Token bucket state shared by everything in this process."""
+
+    # take() only touches memory, so it is called straight from the event loop.
+    blocking = False
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token if one is available. Returns 0, or the seconds until one will be."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class _FileBucketState:
+    """
+    Token bucket state kept in a small locked file, so every worker process on
+    the host draws from the same budget.
+    """
+
+    # take() waits on the file lock and does file I/O; run it off the event loop.
+    blocking = True
+
+    def __init__(self, rate: float, capacity: float, path: str):
+        self.rate = rate
+        self.capacity = capacity
+        self.path = path
+
+    def take(self) -> float:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 256)
+            now = time.time()
+            try:
+                state = json.loads(raw)
+                tokens, updated = state["tokens"], state["updated"]
+            except (ValueError, KeyError, TypeError):
+                tokens, updated = self.capacity, now
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, json.dumps({"tokens": tokens, "updated": now}).encode())
+            return wait
+        finally:
+            os.close(fd)  # Closing the descriptor releases the lock.
+
+
+class TokenBucketLimiter:
+    """
+    Async token-bucket rate limiter with priority lanes.
+    Callers waiting for a token are served strictly by priority, then in
+    arrival order, so interactive traffic jumps ahead of background work.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, state_file: Optional[str] = None):
+        if state_file:
+            self._state = _FileBucketState(rate, capacity, state_file)
+        else:
+            self._state = _LocalBucketState(rate, capacity)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def _take(self) -> float:
+        if self._state.blocking:
+            return await asyncio.to_thread(self._state.take)
+        return self._state.take()
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        """Waits for a token. Raises OSError if a shared state file can't be used."""
+        # A blocking take() yields to the loop, and callers arriving meanwhile would
+        # race it out of order; those always queue and the dispatcher takes for them.
+        if not self._state.blocking and not self._waiters and self._state.take() == 0:
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._counter), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            # Drop callers that gave up (cancelled or timed out) before handing out a token.
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                break
+            try:
+                wait = await self._take()
+            except Exception as e:
+                # Without a working bucket nobody can get a token; fail every
+                # waiter now rather than leave them hanging until they time out.
+                waiters, self._waiters = self._waiters, []
+                for _, _, future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
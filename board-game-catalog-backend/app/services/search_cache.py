@@ -0,0 +1,145 @@
+# app/services/search_cache.py
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services import bgg_api
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SearchCache:
+    """
+    Caches BGG search results by normalized query text.
+    Repeated queries are answered from memory, and a query that extends a
+    cached one ("catan" -> "catan jun") is answered by filtering the shorter
+    query's results when that leaves any. Empty BGG results and BGG 404s
+    are cached for a shorter TTL.
+    Broad queries stop downloading after `max_results` results.
+    Concurrent misses for the same query share one BGG call.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600.0, negative_ttl: float = 300.0,
+                 max_results: Optional[int] = None):
+        self.ttl = ttl
+        self.max_results = max_results
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(max_size)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.prefix_hits + self.misses
+        return {
+            "hits": self.hits,
+            "prefix_hits": self.prefix_hits,
+            "misses": self.misses,
+            "entries": len(self._cache),
+            "hit_ratio": (self.hits + self.prefix_hits) / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return _PUNCTUATION.sub(" ", text.lower()).split()
+
+    def _from_prefix(self, key: str) -> Optional[List[dict]]:
+        # A longer query's results are mostly a subset of a cached shorter
+        # prefix's results, matched word by word ("catan jun" -> "Catan: Junior").
+        # BGG also matches alternate names, which results don't carry, so an
+        # empty filtered list proves nothing and is treated as a miss.
+        # Truncated result lists can't be used this way; they may be missing matches.
+        words = self._words(key)
+        for end in range(len(key) - 1, 0, -1):
+            cached = self._cache.get(key[:end])
+            if cached is not None and self._is_complete(cached):
+                matches = [result for result in cached
+                           if all(word in " ".join(self._words(result["title"] or "")) for word in words)]
+                return matches or None
+        return None
+
+    def _is_complete(self, results: List[dict]) -> bool:
+        return self.max_results is None or len(results) < self.max_results
+
+    async def search(self, query: str) -> List[dict]:
+        key = self.normalize(query)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        from_prefix = self._from_prefix(key)
+        if from_prefix is not None:
+            # Not stored: derived lists are cheap to rebuild and may lack alternate-name matches.
+            self.prefix_hits += 1
+            return from_prefix
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(inflight)
+
+    async def _fetch(self, key: str) -> List[dict]:
+        try:
+            results = await bgg_api.search_bgg_games(key, limit=self.max_results)
+        except bgg_api.BGGAPIError as e:
+            if e.status_code != 404:
+                raise
+            results = []
+        self._cache.put(key, results, self.ttl if results else self.negative_ttl)
+        return results
+
+
+search_cache = SearchCache(
+    max_size=settings.search_cache_size,
+    ttl=settings.search_cache_ttl_seconds,
+    negative_ttl=settings.search_cache_negative_ttl_seconds,
+    max_results=settings.bgg_search_max_results,
+)
@@ -0,0 +1,210 @@
+# app/tracing.py
+"""
+Per-request SQL tracing and on-demand profiling.
+
+Every request records the statements it runs. A statement that runs at
+least `sql_trace_repeat_threshold` times in one request is almost always an
+N+1, and is printed.
+
+When settings.debug_token is set, a request that sends it in X-Debug-Token
+gets a summary in X-SQL-Count / X-SQL-Time-Ms (and X-SQL-Repeated, the
+highest repeat count). It can ask for more with X-Debug. The response body
+is then replaced, and the original status moves to X-Debug-Status:
+
+    X-Debug: sql      the full statement trace as JSON
+    X-Debug: profile  a sampling profile in folded-stack format, ready for
+                      flamegraph.pl or speedscope
+"""
+import hmac
+import json
+import os
+import sys
+import threading
+from collections import Counter as Tally
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core import statement_timer
+
+DEBUG_TOKEN_HEADER = "x-debug-token"
+DEBUG_MODE_HEADER = "x-debug"
+
+
+class SQLTrace:
+    """The statements one request ran, in order, with their durations."""
+
+    def __init__(self, keep_statements: bool = False):
+        self.keep_statements = keep_statements
+        self.count = 0
+        self.seconds = 0.0
+        self.by_statement: Tally = Tally()
+        self.statements: List[dict] = []
+
+    def record(self, statement: str, parameters, elapsed: float, executemany: bool):
+        self.count += 1
+        self.seconds += elapsed
+        self.by_statement[statement] += 1
+        if self.keep_statements:
+            self.statements.append({
+                "sql": " ".join(statement.split()),
+                "parameters": repr(parameters)[:500],
+                "ms": round(elapsed * 1000, 3),
+                "executemany": executemany,
+            })
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements run at least `threshold` times: likely N+1 queries."""
+        return {statement: n for statement, n in self.by_statement.items() if n >= threshold}
+
+
+_current_trace: ContextVar[Optional[SQLTrace]] = ContextVar("sql_trace", default=None)
+
+
+def _record_statement(statement, parameters, elapsed, executemany):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(statement, parameters, elapsed, executemany)
+
+
+def instrument_engine(engine):
+    """Attributes every statement the engine runs to the request being served."""
+    statement_timer.observe(engine, _record_statement)
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack from a background thread every
+    `interval` seconds. Stacks are kept as folded strings ("a;b;c") with a
+    count per stack. On the event loop thread the samples cover whatever the
+    loop was running, so concurrent requests can show up as well.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Tally = Tally()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._fold(frame)] += 1
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        filename = code.co_filename
+        for root in sys.path:
+            if root and filename.startswith(root + os.sep):
+                filename = filename[len(root) + 1:]
+                break
+        return f"{getattr(code, 'co_qualname', code.co_name)} ({filename})".replace(";", ":")
+
+    def _fold(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SQLTraceMiddleware:
+    """Pure ASGI middleware; see the module docstring."""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _debug_access(scope) -> Tuple[bool, Optional[str]]:
+        """(whether the request carries the debug token, the X-Debug mode it asked for)."""
+        if not settings.debug_token:
+            return False, None
+        headers = dict(scope["headers"])
+        token = headers.get(DEBUG_TOKEN_HEADER.encode(), b"").decode("latin-1")
+        if not token or not hmac.compare_digest(token, settings.debug_token):
+            return False, None
+        mode = headers.get(DEBUG_MODE_HEADER.encode(), b"").decode("latin-1").strip().lower()
+        return True, mode if mode in ("sql", "profile") else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        authorized, mode = self._debug_access(scope)
+        trace = SQLTrace(keep_statements=mode == "sql")
+        token = _current_trace.set(trace)
+        original = {"status": 500}
+
+        def summary_headers() -> List[tuple]:
+            headers = [
+                (b"x-sql-count", str(trace.count).encode()),
+                (b"x-sql-time-ms", f"{trace.seconds * 1000:.1f}".encode()),
+            ]
+            repeated = trace.repeated(settings.sql_trace_repeat_threshold)
+            if repeated:
+                headers.append((b"x-sql-repeated", str(max(repeated.values())).encode()))
+            return headers
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + summary_headers()}
+            await send(message)
+
+        async def swallow(message):
+            if message["type"] == "http.response.start":
+                original["status"] = message["status"]
+
+        try:
+            if mode == "profile":
+                with SamplingProfiler(threading.get_ident(), settings.profile_interval_seconds) as profiler:
+                    await self.app(scope, receive, swallow)
+                body, content_type = profiler.folded().encode(), b"text/plain; charset=utf-8"
+            elif mode == "sql":
+                await self.app(scope, receive, swallow)
+                body = json.dumps({
+                    "path": scope["path"],
+                    "count": trace.count,
+                    "ms": round(trace.seconds * 1000, 3),
+                    "repeated": trace.repeated(settings.sql_trace_repeat_threshold),
+                    "statements": trace.statements,
+                }).encode()
+                content_type = b"application/json"
+            else:
+                # Query counts and timings are only for whoever holds the debug token.
+                await self.app(scope, receive, send_with_summary if authorized else send)
+                return
+        finally:
+            _current_trace.reset(token)
+            self._report_repeats(scope, trace)
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-debug-status", str(original["status"]).encode()),
+            ] + summary_headers(),
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _report_repeats(scope, trace: SQLTrace):
+        for statement, n in trace.repeated(settings.sql_trace_repeat_threshold).items():
+            print(f"Possible N+1 on {scope['method']} {scope['path']}: ran {n}x: {' '.join(statement.split())[:200]}")
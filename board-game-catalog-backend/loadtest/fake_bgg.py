@@ -0,0 +1,145 @@
+# loadtest/fake_bgg.py
+"""
+Local stand-in for the BGG xmlapi2, serving recorded /search and /thing
+fixtures so load tests never touch (or get throttled by) the real BGG.
+
+    python -m loadtest.fake_bgg --port 8081 --latency 0.15 --queued-rate 0.05 --throttle-rate 0.02
+
+Point the API at it with BGG_API_URL=http://127.0.0.1:8081/xmlapi2. Every
+response is delayed by `latency` seconds, plus or minus up to `jitter`.
+A `queued_rate` share of requests answer 202, which BGG uses for "queued,
+ask again". A `throttle_rate` share answer 429 with Retry-After. GET
+/_stats reports what was served.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+FIXTURES = Path(__file__).parent / "fixtures"
+TERMS_OF_USE = 'termsofuse="https://boardgamegeek.com/xmlapi/termsofuse"'
+
+
+def _load_items(path: Path) -> List[Tuple[ET.Element, str]]:
+    return [(item, ET.tostring(item, encoding="unicode")) for item in ET.parse(path).getroot()]
+
+
+class FakeBGG:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, queued_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1, seed: Optional[int] = None,
+                 fixtures: Path = FIXTURES):
+        self.latency = latency
+        self.jitter = jitter
+        self.queued_rate = queued_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._things: Dict[str, str] = {item.get("id"): xml for item, xml in _load_items(fixtures / "thing.xml")}
+        self._search: List[Tuple[str, str]] = [
+            (item.find("name").get("value").lower(), xml) for item, xml in _load_items(fixtures / "search.xml")
+        ]
+        self.stats = {"search": 0, "thing": 0, "queued": 0, "throttled": 0}
+        self.app = Starlette(routes=[
+            Route("/xmlapi2/search", self.search),
+            Route("/xmlapi2/thing", self.thing),
+            Route("/_stats", self.read_stats),
+        ])
+
+    @property
+    def known_ids(self) -> List[int]:
+        return [int(bgg_id) for bgg_id in self._things]
+
+    @property
+    def titles(self) -> List[str]:
+        return [title for title, _ in self._search]
+
+    async def _delay_or_fault(self) -> Optional[Response]:
+        delay = max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0)
+        if delay:
+            await asyncio.sleep(delay)
+        draw = self._rng.random()
+        if draw < self.throttle_rate:
+            self.stats["throttled"] += 1
+            return Response("Rate limit exceeded", status_code=429, headers={"Retry-After": str(self.retry_after)})
+        if draw < self.throttle_rate + self.queued_rate:
+            self.stats["queued"] += 1
+            return Response("Your request has been accepted and will be processed.", status_code=202)
+        return None
+
+    @staticmethod
+    def _items(items: List[str], total: bool = False) -> Response:
+        total_attr = f' total="{len(items)}"' if total else ""
+        body = f'<?xml version="1.0" encoding="utf-8"?><items{total_attr} {TERMS_OF_USE}>{"".join(items)}</items>'
+        return Response(body, media_type="text/xml; charset=utf-8")
+
+    async def search(self, request: Request) -> Response:
+        self.stats["search"] += 1
+        fault = await self._delay_or_fault()
+        if fault is not None:
+            return fault
+        query = request.query_params.get("query", "").lower()
+        return self._items([xml for title, xml in self._search if query in title], total=True)
+
+    async def thing(self, request: Request) -> Response:
+        self.stats["thing"] += 1
+        fault = await self._delay_or_fault()
+        if fault is not None:
+            return fault
+        ids = request.query_params.get("id", "").split(",")
+        if len(ids) > 20:
+            return Response("Cannot load more than 20 items", status_code=400)
+        return self._items([self._things[bgg_id] for bgg_id in ids if bgg_id in self._things])
+
+    async def read_stats(self, request: Request) -> Response:
+        return JSONResponse(self.stats)
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a daemon thread, for use inside the load-test runner."""
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8081):
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("fake BGG server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--queued-rate", type=float, default=0.0, help="share of requests answered 202")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    fake = FakeBGG(args.latency, args.jitter, args.queued_rate, args.throttle_rate, args.retry_after, args.seed)
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# loadtest/run.py
+"""
+End-to-end load test: seeds a database, starts the API against a local fake
+BGG server, runs scripted user journeys and reports per-endpoint latency
+percentiles and throughput as JSON.
+
+    python -m loadtest.run --database-url sqlite:///./loadtest.sqlite --concurrency 20 --duration 30 --output results.json
+
+Each virtual user logs in once, then repeats:
+login -> search -> add to collection -> log play -> stats. A 409 from "add
+to collection" (the game is already owned) is an expected outcome, not an
+error. The JSON includes the git commit, so results from two commits can be
+diffed directly.
+
+The database is wiped and reseeded on every run. For SQLite that means the
+file is recreated. For Postgres it is migrated to head and truncated, so only
+ever point this at a scratch database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas
+from app.core.security import get_password_hash
+from app.database import create_db_engine
+from app.services.bgg_api import _parse_thing_item
+from loadtest.dataset import reset_schema
+from loadtest.fake_bgg import FIXTURES, BackgroundServer, FakeBGG, _load_items
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PASSWORD = "loadtest-password"
+PLAYER_NAMES = ["Ann", "Bob", "Carl", "Dee", "Eli", "Fay", "Gus", "Hana"]
+
+
+# --- Seeding ---
+async def seed(database_url: str, users: int, preloaded_share: float, owned_per_user: int, plays_per_user: int,
+               rng: random.Random) -> List[str]:
+    """Creates users, a share of the fixture games and some history per user. Returns the user emails."""
+    engine = create_db_engine(database_url)
+    await reset_schema(engine, database_url)
+    fixture_games = [schemas.GameCreate(**_parse_thing_item(item)) for item, _ in _load_items(FIXTURES / "thing.xml")]
+    # The rest are first fetched from the fake BGG during the run, like new games in production.
+    preloaded = rng.sample(fixture_games, int(len(fixture_games) * preloaded_share))
+    emails = [f"loadtest-{i}@example.com" for i in range(users)]
+    hashed_password = get_password_hash(PASSWORD)
+
+    async with AsyncSession(engine) as db:
+        await db.execute(insert(models.User), [{"email": email, "hashed_password": hashed_password} for email in emails])
+        games = await crud.create_games(db, preloaded)
+        user_ids = (await db.scalars(text("SELECT id FROM users ORDER BY id"))).all()
+        collections, plays = [], []
+        for user_id in user_ids:
+            owned = rng.sample(games, min(len(games), owned_per_user))
+            collections += [{"user_id": user_id, "game_id": game.id} for game in owned]
+            for _ in range(plays_per_user if owned else 0):
+                plays.append({
+                    "owner_id": user_id, "game_id": rng.choice(owned).id,
+                    "date": date.today() - timedelta(days=rng.randint(0, 365)),
+                    "rating": rng.randint(1, 10),
+                    "players": ", ".join(rng.sample(PLAYER_NAMES, rng.randint(1, 4))),
+                })
+        if collections:
+            await db.execute(insert(models.UserCollection), collections)
+        if plays:
+            await db.execute(insert(models.PlaySession), plays)
+        await crud.reconcile_user_stats(db)
+        await crud.rebuild_play_rollups(db)
+        await db.commit()
+    await engine.dispose()
+    return emails
+
+
+# --- API process ---
+def start_api(database_url: str, bgg_url: str, port: int, workers: int, bgg_rate: float) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "BGG_API_URL": bgg_url,
+        "BGG_RATE_PER_SECOND": str(bgg_rate),
+        "BGG_RATE_BURST": str(max(bgg_rate / 2, 2)),
+        # The background refresher would add BGG traffic the journeys didn't cause.
+        "GAME_REFRESH_ENABLED": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited during startup with code {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not become ready in time")
+
+
+# --- Journeys ---
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.journeys = 0
+
+    async def call(self, name: str, request, expected=(200,)) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.errors[name][type(e).__name__] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors[name][str(response.status_code)] += 1
+        return response
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> Optional[dict]:
+    for _ in range(10):
+        response = await recorder.call("login", client.post("/users/token", data={"username": email, "password": PASSWORD}))
+        if response is not None and response.status_code == 200:
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+        # 503 means the password hasher is saturated; back off as its Retry-After asks.
+        retry_after = response.headers.get("Retry-After", "1") if response is not None else "1"
+        await asyncio.sleep(float(retry_after) if retry_after.isdigit() else 1.0)
+    return None
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, email: str, search_terms: List[str],
+                       deadline: float, rng: random.Random):
+    headers = await login(client, recorder, email)
+    if headers is None:
+        return
+    while time.monotonic() < deadline:
+        response = await recorder.call("search", client.get("/games/search", params={"q": rng.choice(search_terms)}))
+        results = response.json() if response is not None and response.status_code == 200 else []
+        if not results:
+            continue
+        bgg_id = rng.choice(results)["bgg_id"]
+        await recorder.call("add_to_collection", client.post(
+            "/games/collection/", json={"game_id": bgg_id}, headers=headers), expected=(201, 409))
+        await recorder.call("log_play", client.post("/plays/", json={
+            "bgg_id": bgg_id, "rating": rng.randint(1, 10),
+            "players": ", ".join(rng.sample(PLAYER_NAMES, rng.randint(1, 4))),
+        }, headers=headers), expected=(201,))
+        await recorder.call("stats", client.get("/users/stats", headers=headers))
+        recorder.journeys += 1
+
+
+# --- Report ---
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(int(-(-p * len(ordered) // 100)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name, latencies in recorder.latencies.items():
+        ordered = sorted(latencies)
+        errors = sum(recorder.errors[name].values())
+        endpoints[name] = {
+            "requests": len(ordered),
+            "errors": errors,
+            "error_breakdown": dict(recorder.errors[name]),
+            "throughput_rps": round(len(ordered) / elapsed, 2),
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+    total = sum(len(latencies) for latencies in recorder.latencies.values())
+    return {
+        "duration_seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "journeys": recorder.journeys,
+        "journeys_per_second": round(recorder.journeys / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_journeys(base_url: str, emails: List[str], search_terms: List[str], concurrency: int,
+                       duration: float, seed: int) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(*(
+            virtual_user(client, recorder, emails[i % len(emails)], search_terms, deadline, random.Random(seed + i))
+            for i in range(concurrency)
+        ))
+        elapsed = time.monotonic() - started
+    return summarize(recorder, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./loadtest.sqlite")
+    parser.add_argument("--users", type=int, default=50, help="seeded accounts")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users running journeys at once")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of journeys")
+    parser.add_argument("--preloaded-share", type=float, default=0.5, help="share of fixture games already in the DB")
+    parser.add_argument("--owned-per-user", type=int, default=5)
+    parser.add_argument("--plays-per-user", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--bgg-port", type=int, default=8766)
+    parser.add_argument("--bgg-rate", type=float, default=4.0, help="BGG requests per second the API may send")
+    parser.add_argument("--bgg-latency", type=float, default=0.15)
+    parser.add_argument("--bgg-jitter", type=float, default=0.05)
+    parser.add_argument("--bgg-queued-rate", type=float, default=0.05, help="share of BGG requests answered 202")
+    parser.add_argument("--bgg-throttle-rate", type=float, default=0.02, help="share of BGG requests answered 429")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fake = FakeBGG(args.bgg_latency, args.bgg_jitter, args.bgg_queued_rate, args.bgg_throttle_rate, seed=args.seed)
+    # Title fragments, as a user types them; some match several games.
+    search_terms = sorted({word[:5] for title in fake.titles for word in title.split() if len(word) >= 4})
+
+    print(f"Seeding {args.database_url} ...", file=sys.stderr)
+    emails = asyncio.run(seed(args.database_url, args.users, args.preloaded_share,
+                              args.owned_per_user, args.plays_per_user, rng))
+    started_at = datetime.now(timezone.utc).isoformat()
+    with BackgroundServer(fake.app, port=args.bgg_port):
+        api = start_api(args.database_url, f"http://127.0.0.1:{args.bgg_port}/xmlapi2",
+                        args.api_port, args.workers, args.bgg_rate)
+        try:
+            base_url = f"http://127.0.0.1:{args.api_port}"
+            wait_until_ready(base_url, api)
+            print(f"Running {args.concurrency} virtual users for {args.duration:g}s ...", file=sys.stderr)
+            results = asyncio.run(run_journeys(base_url, emails, search_terms, args.concurrency,
+                                               args.duration, args.seed))
+        finally:
+            api.terminate()
+            api.wait(timeout=30)
+
+    report = {
+        "commit": git_commit(),
+        "started_at": started_at,
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        **results,
+        "fake_bgg": fake.stats,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+# rebuild_play_rollups.py
+"""
+Recomputes the /plays/analytics rollup tables from play_sessions. The API
+keeps them current as plays are logged; run this after bulk imports or data
+fixes. Pass a user id to rebuild a single user.
+
+    python rebuild_play_rollups.py [user_id]
+"""
+import asyncio
+import sys
+
+from app import crud
+from app.database import SessionLocal, engine
+
+async def rebuild(user_id=None):
+    async with SessionLocal() as db:
+        plays = await crud.rebuild_play_rollups(db, user_id=user_id)
+        await db.commit()
+        print(f"Rebuilt play rollups from {plays} play(s).")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild(int(sys.argv[1]) if len(sys.argv) > 1 else None))
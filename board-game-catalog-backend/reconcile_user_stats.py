@@ -0,0 +1,22 @@
+# reconcile_user_stats.py
+"""
+Rebuilds the user_stats counters from user_collections, wishlists and
+play_sessions. The API keeps them current incrementally; run this after bulk
+data fixes or if the counters are ever suspected to have drifted.
+
+    python reconcile_user_stats.py
+"""
+import asyncio
+
+from app import crud
+from app.database import SessionLocal, engine
+
+async def reconcile():
+    async with SessionLocal() as db:
+        reconciled = await crud.reconcile_user_stats(db)
+        await db.commit()
+        print(f"Reconciled stats for {reconciled} user(s).")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())
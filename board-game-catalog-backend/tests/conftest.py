@@ -0,0 +1,88 @@
+# tests/conftest.py
+import asyncio
+import os
+import sys
+import tempfile
+
+# app.config / app.database read these at import time; point them at a scratch
+# SQLite file so importing the app never reaches for a real Postgres.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='gameshelf-tests-')}/app.sqlite")
+os.environ.setdefault("GAME_REFRESH_ENABLED", "false")
+# The lowest cost bcrypt accepts, so registering and logging in stays fast.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine
+from app.services import bgg_api
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.game_resolver import game_resolver
+from app.services.principal_cache import principal_cache
+from app.services.rate_limiter import TokenBucketLimiter
+from app.services.search_cache import search_cache
+from loadtest.fake_bgg import FakeBGG
+
+
+async def _reset_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # The app's requests run on the TestClient's own event loop.
+    await engine.dispose()
+
+
+@pytest.fixture
+def fake_bgg():
+    """The load tests' fake BGG, served in-process; tests may set its fault rates."""
+    return FakeBGG(seed=0)
+
+
+@pytest.fixture
+def client(fake_bgg):
+    """A TestClient on an empty database, with the BGG client pointed at fake_bgg."""
+    from app.main import app
+
+    asyncio.run(_reset_schema())
+    for cache in (game_resolver._cache, search_cache._cache, principal_cache._cache):
+        cache.clear()
+    bgg_client = bgg_api.bgg_client
+    bgg_client.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    bgg_client.limiter = TokenBucketLimiter(rate=1000, capacity=1000)
+    bgg_client.backoff_base = bgg_client.backoff_max = 0.01
+    with TestClient(app) as test_client:
+        bgg_client._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=fake_bgg.app), base_url="http://bgg/xmlapi2"
+        )
+        yield test_client
+        test_client.portal.call(engine.dispose)
+
+
+@pytest.fixture
+def run_db(client):
+    """Runs `fn(db)` in a committed session on the app's event loop and returns its result."""
+    async def in_session(fn):
+        async with SessionLocal() as db:
+            result = await fn(db)
+            await db.commit()
+            return result
+
+    return lambda fn: client.portal.call(in_session, fn)
+
+
+@pytest.fixture
+def login(client):
+    """Registers (if needed) and logs in a user; returns its Authorization header."""
+    def login(email: str = "player@example.com", password: str = "secret") -> dict:
+        client.post("/users/register", json={"email": email, "password": password})
+        response = client.post("/users/token", data={"username": email, "password": password})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
+
+
+@pytest.fixture
+def auth_headers(login):
+    return login()
@@ -0,0 +1,41 @@
+# tests/test_async_handlers.py
+"""
+An `async def` handler runs on the event loop, so a synchronous Session call
+inside it stalls every other request in the worker. These guard the rule
+that database access in handlers and crud goes through AsyncSession.
+"""
+import inspect
+
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.database import get_db
+from app.main import app
+
+
+def _routes_using_db():
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        parameters = inspect.signature(route.endpoint).parameters.values()
+        if any(getattr(p.default, "dependency", None) is get_db for p in parameters):
+            yield route
+
+
+@pytest.mark.parametrize("route", list(_routes_using_db()), ids=lambda route: f"{sorted(route.methods)[0]} {route.path}")
+def test_db_handlers_use_async_session(route):
+    assert inspect.iscoroutinefunction(route.endpoint), "DB-bound handler must be async"
+    db = next(p for p in inspect.signature(route.endpoint).parameters.values()
+              if getattr(p.default, "dependency", None) is get_db)
+    assert db.annotation is AsyncSession
+
+
+def test_crud_functions_taking_a_session_are_coroutines():
+    blocking = [
+        name for name, fn in inspect.getmembers(crud, inspect.isfunction)
+        if fn.__module__ == crud.__name__ and not name.startswith("_")
+        and "db" in inspect.signature(fn).parameters and not inspect.iscoroutinefunction(fn)
+    ]
+    assert blocking == []
@@ -0,0 +1,122 @@
+# tests/test_bgg_client.py
+"""
+Retry, circuit-breaker and fallback behaviour of the BGG client, against
+scripted httpx responses and, through the API, loadtest's FakeBGG.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import bgg_api
+from app.services.bgg_api import BGGAPIError, BGGClient, BGGUnavailableError
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.rate_limiter import TokenBucketLimiter
+
+THING = '<?xml version="1.0" encoding="utf-8"?><items><item type="boardgame" id="13"/></items>'
+
+
+def _client(responses, failure_threshold=3, max_retries=3):
+    """A BGGClient whose requests are answered, in order, by `responses`; returns it and the request log."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status, headers = responses[min(len(requests), len(responses)) - 1]
+        return httpx.Response(status, headers=headers, text=THING if status == 200 else "")
+
+    client = BGGClient(
+        base_url="http://bgg/xmlapi2",
+        breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=60),
+        limiter=TokenBucketLimiter(rate=1000, capacity=1000),
+        max_retries=max_retries,
+        backoff_base=0.001,
+        backoff_max=0.001,
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=client.base_url)
+    return client, requests
+
+
+async def _fetch(client):
+    async with client.stream("/thing", {"id": "13"}) as response:
+        return response.status_code
+
+
+def test_queued_and_throttled_answers_are_retried():
+    client, requests = _client([(202, {}), (429, {"Retry-After": "0"}), (200, {})])
+
+    assert asyncio.run(_fetch(client)) == 200
+    assert len(requests) == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_stop_after_max_retries():
+    client, requests = _client([(503, {})], failure_threshold=10, max_retries=2)
+
+    with pytest.raises(BGGAPIError):
+        asyncio.run(_fetch(client))
+    assert len(requests) == 3
+
+
+def test_breaker_opens_after_failure_threshold_and_fails_fast():
+    client, requests = _client([(503, {})], failure_threshold=3, max_retries=0)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(BGGAPIError):
+                await _fetch(client)
+        with pytest.raises(BGGUnavailableError):
+            await _fetch(client)
+
+    asyncio.run(scenario())
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert len(requests) == 3
+
+
+def test_client_errors_do_not_count_against_the_breaker():
+    client, requests = _client([(400, {})], failure_threshold=1, max_retries=0)
+
+    with pytest.raises(BGGAPIError) as error:
+        asyncio.run(_fetch(client))
+    assert error.value.status_code == 400
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def _open_breaker():
+    breaker = bgg_api.bgg_client.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_search_bgg_falls_back_to_local_games_while_breaker_is_open(client, fake_bgg):
+    assert client.get("/games/13").status_code == 200
+    _open_breaker()
+
+    response = client.get("/games/search-bgg", params={"query": "catan"})
+
+    assert response.status_code == 200
+    assert [result["bgg_id"] for result in response.json()] == [13]
+    assert fake_bgg.stats["search"] == 0
+
+
+def test_batch_lookups_answer_503_when_bgg_is_unavailable(client, auth_headers, fake_bgg):
+    assert client.get("/games/13").status_code == 200
+    _open_breaker()
+
+    # Games already stored locally are still served...
+    response = client.get("/games/", params={"bgg_ids": "13"})
+    assert response.status_code == 200
+    assert [game["bgg_id"] for game in response.json()] == [13]
+    # ...but one that would need BGG is not reported as missing.
+    assert client.get("/games/", params={"bgg_ids": "13,822"}).status_code == 503
+    response = client.post("/plays/bulk", json=[{"bgg_id": 822}], headers=auth_headers)
+    assert response.status_code == 503
+
+
+def test_batch_lookups_leave_out_ids_bgg_does_not_know(client, auth_headers):
+    response = client.get("/games/", params={"bgg_ids": "13,999999999"})
+    assert response.status_code == 200
+    assert [game["bgg_id"] for game in response.json()] == [13]
+
+    response = client.post("/plays/bulk", json=[{"bgg_id": 999999999}], headers=auth_headers)
+    assert response.status_code == 404
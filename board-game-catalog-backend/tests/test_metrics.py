@@ -0,0 +1,28 @@
+# tests/test_metrics.py
+import re
+
+
+def _samples(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {
+        name: float(value)
+        for name, value in re.findall(r"^(\S+) (\S+)$", response.text, re.MULTILINE)
+    }
+
+
+def test_search_cache_lookups_are_exported(client, fake_bgg):
+    before = _samples(client)
+
+    client.get("/games/search-bgg", params={"query": "ticket"})
+    client.get("/games/search-bgg", params={"query": "Ticket"})
+    response = client.get("/games/search-bgg", params={"query": "ticket ride"})
+
+    assert "Ticket to Ride" in [result["title"] for result in response.json()]
+    assert fake_bgg.stats["search"] == 1
+    after = _samples(client)
+    for result in ("hit", "prefix_hit", "miss"):
+        key = f'search_cache_lookups_total{{result="{result}"}}'
+        assert after[key] - before.get(key, 0) == 1
+    assert 0 < after["search_cache_hit_ratio"] <= 1
+    assert after["search_cache_entries"] == 1
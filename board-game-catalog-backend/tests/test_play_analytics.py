@@ -0,0 +1,68 @@
+# tests/test_play_analytics.py
+from datetime import date
+
+from app import crud
+
+
+def _log_game_night(client, headers):
+    client.post("/plays/", json={"bgg_id": 13, "date": "2024-01-30", "rating": 8, "players": "Ann, Bob"},
+                headers=headers)
+    response = client.post("/plays/bulk", json=[
+        {"bgg_id": 13, "date": "2024-01-31", "rating": 6, "players": "Ann"},
+        {"bgg_id": 822, "date": "2024-02-01", "rating": 9, "players": "Bob; Cid"},
+        {"bgg_id": 822, "date": "2024-02-01"},
+    ], headers=headers)
+    assert response.status_code == 201
+
+
+def test_rollups_are_kept_current_as_plays_are_logged(client, auth_headers):
+    _log_game_night(client, auth_headers)
+
+    analytics = client.get("/plays/analytics", headers=auth_headers).json()
+
+    assert analytics["total_plays"] == 4
+    assert analytics["plays_per_month"] == [{"month": "2024-01", "plays": 2}, {"month": "2024-02", "plays": 2}]
+    assert [(game["bgg_id"], game["plays"]) for game in analytics["most_played"]] == [(822, 2), (13, 2)]
+    assert [(game["bgg_id"], game["average_rating"]) for game in analytics["average_ratings"]] == [(822, 9.0), (13, 7.0)]
+    assert {game["bgg_id"]: game["last_played"] for game in analytics["most_played"]} == {
+        13: "2024-01-31", 822: "2024-02-01"}
+    assert analytics["streaks"] == {
+        "current": 0, "longest": 3, "longest_start": "2024-01-30", "longest_end": "2024-02-01"}
+    assert analytics["h_index"] == 2
+    assert analytics["co_players"] == [
+        {"name": "Ann", "plays": 2}, {"name": "Bob", "plays": 2}, {"name": "Cid", "plays": 1}]
+
+
+def test_rebuild_matches_incremental_rollups(client, auth_headers, run_db):
+    _log_game_night(client, auth_headers)
+    incremental = client.get("/plays/analytics", headers=auth_headers).json()
+
+    assert run_db(crud.rebuild_play_rollups) == 4
+
+    assert client.get("/plays/analytics", headers=auth_headers).json() == incremental
+
+
+def test_failed_bulk_import_leaves_rollups_alone(client, auth_headers):
+    _log_game_night(client, auth_headers)
+    before = client.get("/plays/analytics", headers=auth_headers).json()
+
+    response = client.post("/plays/bulk", json=[{"bgg_id": 13}, {"bgg_id": 999999999}], headers=auth_headers)
+
+    assert response.status_code == 404
+    assert client.get("/plays/analytics", headers=auth_headers).json() == before
+
+
+def test_play_streaks():
+    days = [date(2024, 3, 1), date(2024, 3, 2), date(2024, 3, 5), date(2024, 3, 6), date(2024, 3, 7)]
+
+    assert crud._play_streaks(days, today=date(2024, 3, 8)) == {
+        "current": 3, "longest": 3, "longest_start": date(2024, 3, 5), "longest_end": date(2024, 3, 7)}
+    assert crud._play_streaks(days, today=date(2024, 3, 9))["current"] == 0
+    assert crud._play_streaks([], today=date(2024, 3, 9))["longest"] == 0
+
+
+def test_h_index():
+    assert crud._h_index([]) == 0
+    assert crud._h_index([1]) == 1
+    assert crud._h_index([10, 8, 5, 4, 3]) == 4
+    assert crud._h_index([25, 8, 5, 3, 3]) == 3
@@ -0,0 +1,63 @@
+# tests/test_plays.py
+from datetime import date, timedelta
+
+
+def _log_plays(client, headers, bgg_id, count, start=date(2024, 1, 1)):
+    plays = [{"bgg_id": bgg_id, "date": (start + timedelta(days=i)).isoformat()} for i in range(count)]
+    response = client.post("/plays/bulk", json=plays, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_read_play_sessions_for_one_game(client, auth_headers):
+    _log_plays(client, auth_headers, 13, 3)
+    other = _log_plays(client, auth_headers, 822, 1)
+    catan_id = client.get("/games/13").json()["id"]
+
+    response = client.get(f"/plays/{catan_id}", headers=auth_headers)
+
+    assert response.status_code == 200
+    plays = response.json()
+    assert [play["date"] for play in plays] == ["2024-01-03", "2024-01-02", "2024-01-01"]
+    assert all(play["game_id"] == catan_id for play in plays)
+    assert other[0]["id"] not in {play["id"] for play in plays}
+
+
+def _follow(client, headers, url):
+    """Pages through a list endpoint by its Link header; returns the ids of every page."""
+    pages = []
+    while url:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append([play["id"] for play in response.json()])
+        link = response.headers.get("link")
+        url = link[link.index("<") + 1:link.index(">")] if link else None
+    return pages
+
+
+def test_cursor_pages_cover_every_play_once(client, auth_headers):
+    _log_plays(client, auth_headers, 13, 5)
+    _log_plays(client, auth_headers, 822, 2, start=date(2024, 1, 3))
+    everything = [play["id"] for play in client.get("/plays/", headers=auth_headers).json()]
+
+    pages = _follow(client, auth_headers, "/plays/?limit=3")
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == everything
+
+
+def test_skip_applies_once_and_the_cursor_continues_after_it(client, auth_headers):
+    _log_plays(client, auth_headers, 13, 7)
+    everything = [play["id"] for play in client.get("/plays/", headers=auth_headers).json()]
+
+    response = client.get("/plays/", params={"skip": 2, "limit": 2}, headers=auth_headers)
+    assert [play["id"] for play in response.json()] == everything[2:4]
+    assert "skip" not in response.headers["link"]
+
+    pages = _follow(client, auth_headers, "/plays/?skip=2&limit=2")
+    assert sum(pages, []) == everything[2:]
+
+
+def test_tampered_cursor_is_rejected(client, auth_headers):
+    response = client.get("/plays/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
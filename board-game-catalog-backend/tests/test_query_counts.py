@@ -0,0 +1,85 @@
+# tests/test_query_counts.py
+"""
+The list endpoints must issue a fixed number of queries however many rows
+the user has. Each test loads the page and serializes it the way the
+endpoint does, under QueryCounter, for a small and a larger user.
+"""
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud, models, schemas
+from app.core.query_counter import QueryCounter, assert_max_queries
+from app.database import Base, create_db_engine
+
+SIZES = (1, 25)
+
+
+async def _database(path):
+    engine = create_db_engine(f"sqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+async def _seed(session_factory, rows: int) -> int:
+    async with session_factory() as db:
+        user = models.User(email=f"user{rows}@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        for i in range(rows):
+            game = models.Game(bgg_id=rows * 1000 + i, title=f"Game {rows}-{i:03d}")
+            db.add_all([
+                models.UserCollection(owner=user, game=game, times_played=i),
+                models.Wishlist(owner=user, game=game, priority=1),
+                models.PlaySession(owner=user, game=game, date=date(2024, 1, 1) + timedelta(days=i)),
+            ])
+        await db.commit()
+        return user.id
+
+
+def _count_queries(tmp_path, load, serialize):
+    """Query counts for each user in SIZES, for loading and serializing one page."""
+    async def run():
+        engine, session_factory = await _database(tmp_path / "queries.sqlite")
+        user_ids = [await _seed(session_factory, rows) for rows in SIZES]
+        counts = []
+        for rows, user_id in zip(SIZES, user_ids):
+            async with session_factory() as db:
+                with assert_max_queries(1, engine) as queries:
+                    page = await load(db, user_id=user_id)
+                    serialized = [serialize.model_validate(entry) for entry in page]
+                assert len(serialized) == rows
+                counts.append(queries.count)
+        await engine.dispose()
+        return counts
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("load, serialize", [
+    (crud.get_user_collections, schemas.UserCollectionInDB),
+    (crud.get_user_wishlist, schemas.WishlistInDB),
+    (crud.get_all_user_plays, schemas.PlaySessionWithGame),
+], ids=["collection", "wishlist", "plays"])
+def test_list_queries_do_not_grow_with_rows(tmp_path, load, serialize):
+    counts = _count_queries(tmp_path, load, serialize)
+    assert len(set(counts)) == 1, f"query count changed with row count: {dict(zip(SIZES, counts))}"
+
+
+def test_query_counter_records_statements(tmp_path):
+    async def run():
+        engine, session_factory = await _database(tmp_path / "counter.sqlite")
+        user_id = await _seed(session_factory, 3)
+        async with session_factory() as db:
+            with QueryCounter(engine) as queries:
+                await db.get(models.Game, 1)
+                await db.get(models.User, user_id)
+        await engine.dispose()
+        return queries
+
+    queries = asyncio.run(run())
+    assert queries.count == 2
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in queries.statements)
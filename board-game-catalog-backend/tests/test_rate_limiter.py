@@ -0,0 +1,82 @@
+# tests/test_rate_limiter.py
+import asyncio
+
+import pytest
+
+from app.services.rate_limiter import Priority, TokenBucketLimiter
+
+
+async def _served_order(limiter, requests):
+    """Queues `requests` as (name, priority) while the bucket is empty; returns the order they get tokens."""
+    order = []
+
+    async def wait(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+
+    await limiter.acquire()  # empties the single-token bucket
+    tasks = []
+    for name, priority in requests:
+        tasks.append(asyncio.create_task(wait(name, priority)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.parametrize("state_file", [False, True], ids=["memory", "file"])
+def test_interactive_callers_jump_ahead_of_background_ones(tmp_path, state_file):
+    limiter = TokenBucketLimiter(rate=200, capacity=1, state_file=str(tmp_path / "bucket.json") if state_file else None)
+
+    order = asyncio.run(_served_order(limiter, [
+        ("refresh-1", Priority.BACKGROUND),
+        ("refresh-2", Priority.BACKGROUND),
+        ("search-1", Priority.INTERACTIVE),
+        ("search-2", Priority.INTERACTIVE),
+    ]))
+
+    assert order == ["search-1", "search-2", "refresh-1", "refresh-2"]
+
+
+def test_cancelled_waiters_do_not_consume_tokens():
+    limiter = TokenBucketLimiter(rate=50, capacity=1)
+
+    async def scenario():
+        await limiter.acquire()
+        gave_up = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        gave_up.cancel()
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+        return limiter.queue_depth()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_processes_sharing_a_state_file_share_one_budget(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    first = TokenBucketLimiter(rate=1, capacity=2, state_file=path)
+    second = TokenBucketLimiter(rate=1, capacity=2, state_file=path)
+
+    async def scenario():
+        await first.acquire()
+        await second.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(first.acquire(), timeout=0.2)
+
+    asyncio.run(scenario())
+
+
+def test_an_unusable_state_file_fails_every_waiter(tmp_path):
+    path = tmp_path / "bucket.json"
+    limiter = TokenBucketLimiter(rate=5, capacity=1, state_file=str(path))
+
+    async def scenario():
+        await limiter.acquire()
+        waiters = [asyncio.create_task(asyncio.wait_for(limiter.acquire(), timeout=5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        limiter._state.path = str(tmp_path / "missing" / "bucket.json")
+        return await asyncio.gather(*waiters, return_exceptions=True)
+
+    results = asyncio.run(asyncio.wait_for(scenario(), timeout=2))
+
+    assert [type(result) for result in results] == [FileNotFoundError] * 3
+    assert limiter.queue_depth() == 0
@@ -0,0 +1,51 @@
+# tests/test_user_stats.py
+from sqlalchemy import update
+
+from app import crud, models
+
+
+def _stats(client, headers) -> dict:
+    response = client.get("/users/stats", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_counters_follow_adds_removes_and_bulk_plays(client, auth_headers):
+    assert _stats(client, auth_headers) == {"collection_count": 0, "wishlist_count": 0, "plays_count": 0}
+
+    shelf = client.post("/games/collection/", json={"game_id": 13}, headers=auth_headers).json()
+    client.post("/games/collection/", json={"game_id": 822}, headers=auth_headers)
+    assert client.post("/games/collection/", json={"game_id": 13}, headers=auth_headers).status_code == 409
+    client.post("/wishlists/", json={"game_id": 9209}, headers=auth_headers)
+    client.post("/wishlists/", json={"game_id": 30549}, headers=auth_headers)
+    # Moving a wished-for game to the shelf updates both counters.
+    client.post("/games/collection/", json={"game_id": 9209}, headers=auth_headers)
+    assert client.delete(f"/games/collection/{shelf['id']}", headers=auth_headers).status_code == 204
+    client.post("/plays/", json={"bgg_id": 13}, headers=auth_headers)
+    client.post("/plays/bulk", json=[{"bgg_id": 822}, {"bgg_id": 822}, {"bgg_id": 13}], headers=auth_headers)
+
+    assert _stats(client, auth_headers) == {"collection_count": 2, "wishlist_count": 1, "plays_count": 4}
+
+
+def test_failed_bulk_import_leaves_counters_alone(client, auth_headers):
+    client.post("/plays/", json={"bgg_id": 13}, headers=auth_headers)
+
+    response = client.post("/plays/bulk", json=[{"bgg_id": 13}, {"bgg_id": 999999999}], headers=auth_headers)
+
+    assert response.status_code == 404
+    assert _stats(client, auth_headers)["plays_count"] == 1
+
+
+def test_reconcile_rebuilds_drifted_counters(client, auth_headers, run_db):
+    client.post("/games/collection/", json={"game_id": 13}, headers=auth_headers)
+    client.post("/wishlists/", json={"game_id": 822}, headers=auth_headers)
+    client.post("/plays/bulk", json=[{"bgg_id": 13}, {"bgg_id": 13}], headers=auth_headers)
+    expected = _stats(client, auth_headers)
+
+    async def drift(db):
+        await db.execute(update(models.UserStats).values(collection_count=7, wishlist_count=0, plays_count=0))
+    run_db(drift)
+    assert _stats(client, auth_headers) != expected
+
+    assert run_db(crud.reconcile_user_stats) == 1
+    assert _stats(client, auth_headers) == expected
@@ -0,0 +1,49 @@
+# tests/test_users.py
+from app.core import security
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logout_all_revokes_every_earlier_token(client, login):
+    first = login()
+    second = login()
+    assert client.get("/users/me", headers=first).status_code == 200
+
+    assert client.post("/users/logout-all", headers=second).status_code == 204
+
+    assert client.get("/users/me", headers=first).status_code == 401
+    assert client.get("/users/me", headers=second).status_code == 401
+    assert client.get("/users/me", headers=login()).status_code == 200
+
+
+def test_password_change_revokes_old_tokens_and_returns_a_new_one(client, login):
+    old = login(password="secret")
+
+    response = client.post(
+        "/users/password", json={"current_password": "secret", "new_password": "better"}, headers=old
+    )
+
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=old).status_code == 401
+    assert client.get("/users/me", headers=_bearer(response.json()["access_token"])).status_code == 200
+    rejected = client.post("/users/token", data={"username": "player@example.com", "password": "secret"})
+    assert rejected.status_code == 401
+
+
+def test_password_change_requires_the_current_password(client, auth_headers):
+    response = client.post(
+        "/users/password", json={"current_password": "wrong", "new_password": "better"}, headers=auth_headers
+    )
+
+    assert response.status_code == 400
+    assert client.get("/users/me", headers=auth_headers).status_code == 200
+
+
+def test_tokens_without_user_id_and_version_are_rejected(client, auth_headers):
+    legacy = security.create_access_token(data={"sub": "player@example.com"})
+    unversioned = security.create_access_token(data={"sub": "player@example.com", "uid": 1})
+
+    assert client.get("/users/me", headers=_bearer(legacy)).status_code == 401
+    assert client.get("/users/me", headers=_bearer(unversioned)).status_code == 401
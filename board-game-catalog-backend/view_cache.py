@@ -1,18 +1,11 @@
 # view_cache.py
-import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
 
-load_dotenv()
+from app.database import create_db_engine
 
-DATABASE_URL = "postgresql://{user}:{password}@{server}/{db}".format(
-    user=os.getenv("POSTGRES_USER"),
-    password=os.getenv("POSTGRES_PASSWORD"),
-    server=os.getenv("POSTGRES_SERVER"),
-    db=os.getenv("POSTGRES_DB"),
-)
-engine = create_engine(DATABASE_URL)
+# Same settings (DATABASE_URL or POSTGRES_*) and pool options as the API.
+engine = create_db_engine(asynchronous=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def view_cached_games():